@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 import dj_database_url
+from importlib.util import find_spec
+from django.core.exceptions import ImproperlyConfigured
 
 from dotenv import load_dotenv
 from pathlib import Path
@@ -75,6 +77,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.metrics.RequestMetricsMiddleware',
+    'tasks.routers.ReplicaRoutingMiddleware',
+    'tasks.compression.ThresholdGZipMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -127,6 +132,44 @@ DATABASES = {
     # }
 } 
 
+# Read replicas, as a comma-separated DATABASE_REPLICA_URLS. Reads made
+# while serving GET requests are spread over them (see tasks/routers.py);
+# for a local try-out, point one at a copy of a SQLite database file.
+DATABASE_REPLICAS = []
+for i, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(','))):
+    alias = f'replica_{i}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=600,
+        ssl_require=not url.strip().startswith('sqlite'),
+    )
+    # Tests run against the primary's test database only
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+# Extra databases for tasks, as a comma-separated DATABASE_SHARD_URLS. Each
+# user's tasks live on one of TASK_SHARDS (default first), picked when the
+# account is created; see tasks/sharding.py. Only ever append to the list:
+# a shard's position decides the range its ids are allocated from. For a
+# local try-out, use several SQLite files and `migrate --database shard_N`.
+TASK_SHARDS = ['default']
+for i, url in enumerate(filter(None, os.getenv('DATABASE_SHARD_URLS', '').split(',')), start=1):
+    alias = f'shard_{i}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=600,
+        ssl_require=not url.strip().startswith('sqlite'),
+    )
+    TASK_SHARDS.append(alias)
+# How long a user's shard assignment is cached; moves update the cache
+# directly, this bounds how long anything missed can go stale
+TASK_SHARD_CACHE_TIMEOUT = int(os.getenv('TASK_SHARD_CACHE_TIMEOUT', 300))  # seconds
+
+DATABASE_ROUTERS = ['tasks.routers.TaskShardRouter', 'tasks.routers.PrimaryReplicaRouter']
+# After a user writes, their reads stay on the primary this long so they
+# see their own changes despite replication lag
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
 
 
 # backend/settings/production.py
@@ -139,6 +182,18 @@ EMAIL_HOST_USER = 'EMAIL_HOST_USER'
 EMAIL_HOST_PASSWORD = 'EMAIL_HOST_PASSWORD'
 DEFAULT_FROM_EMAIL = 'Task Manager <no-reply@yourdomain.com>'
 
+# Email outbox worker (manage.py send_outbox)
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('OUTBOX_RETRY_BASE_SECONDS', 30))
+OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', 300))
+
+# Due-date reminders (manage.py run_reminders)
+REMINDER_LEAD_MINUTES = int(os.getenv('REMINDER_LEAD_MINUTES', 60))  # remind this long before due
+REMINDER_GRACE_MINUTES = int(os.getenv('REMINDER_GRACE_MINUTES', 60))  # still send this late after a restart
+REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 500))
+REMINDER_REFRESH_SECONDS = int(os.getenv('REMINDER_REFRESH_SECONDS', 60))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -189,11 +244,125 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'tasks.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Proxies in front of the app (Render's load balancer). Client IPs, as
+    # used by the auth throttles, are taken this many entries from the right
+    # of X-Forwarded-For, which clients can't forge; 0 uses REMOTE_ADDR
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+}
 
+# Faster encoders where installed (see tasks/renderers.py): orjson behind the
+# same application/json, and MessagePack for clients that Accept it
+if find_spec('orjson'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = 'tasks.renderers.ORJSONRenderer'
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'][0] = 'tasks.renderers.ORJSONParser'
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('tasks.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('tasks.renderers.MessagePackParser')
+
+# Responses at least this big are gzipped for clients that accept it;
+# smaller ones aren't worth the CPU (tasks/compression.py)
+GZIP_MIN_BYTES = int(os.getenv('GZIP_MIN_BYTES', 1024))
+
+# Set REDIS_URL whenever more than one process serves requests: the auth
+# throttle buckets need a cache every worker shares. Without it each
+# process caches on its own, which is fine for runserver and the tests.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'task-manager',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000))},
+        }
+    }
+
+# Replica pins and shard assignments are kept in the cache. A per-process
+# cache would lose a user's pin on the next worker, and keep sending a
+# moved user's tasks to their old shard
+if not REDIS_URL and not DEBUG:
+    if DATABASE_REPLICAS:
+        raise ImproperlyConfigured('DATABASE_REPLICA_URLS needs a shared cache: set REDIS_URL')
+    if len(TASK_SHARDS) > 1:
+        raise ImproperlyConfigured('DATABASE_SHARD_URLS needs a shared cache: set REDIS_URL')
+
+# Serialized task lists are cached per user and version (see tasks/caching.py)
+TASK_LIST_CACHE_TIMEOUT = int(os.getenv('TASK_LIST_CACHE_TIMEOUT', 300))  # seconds
+
+# Sync tokens older than this get a full reset instead of a delta
+TASK_TOMBSTONE_RETENTION_DAYS = int(os.getenv('TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Completed tasks are moved to the archive table after this long (manage.py
+# archive_tasks); matches the longest stats histogram
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv('TASK_ARCHIVE_AFTER_DAYS', 90))
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv('TASK_ARCHIVE_BATCH_SIZE', 1000))
+
+# Largest list accepted by /api/tasks/batch/
+TASK_BATCH_MAX_OPERATIONS = int(os.getenv('TASK_BATCH_MAX_OPERATIONS', 500))
+
+# Per-process cache of authenticated users (see tasks/authentication.py)
+USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', 1024))
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))  # seconds
+
+# Structured logs (see tasks/log.py) are formatted and written by a
+# background listener; info and debug events can be sampled down
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_INFO_SAMPLE_RATE = float(os.getenv('LOG_INFO_SAMPLE_RATE', 1.0))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.1))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sample': {
+            '()': 'tasks.log.SamplingFilter',
+            'rates': {'INFO': LOG_INFO_SAMPLE_RATE, 'DEBUG': LOG_DEBUG_SAMPLE_RATE},
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'tasks.log.queued_handler',
+            'filters': ['sample'],
+        },
+    },
+    'loggers': {
+        'tasks': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
 }
 
+# Token buckets for login, registration and token requests (see
+# tasks/throttling.py): allow a burst, then refill at a steady rate
+AUTH_THROTTLE_IP_BURST = int(os.getenv('AUTH_THROTTLE_IP_BURST', 20))
+AUTH_THROTTLE_IP_PER_MINUTE = int(os.getenv('AUTH_THROTTLE_IP_PER_MINUTE', 10))
+AUTH_THROTTLE_EMAIL_BURST = int(os.getenv('AUTH_THROTTLE_EMAIL_BURST', 10))
+AUTH_THROTTLE_EMAIL_PER_MINUTE = int(os.getenv('AUTH_THROTTLE_EMAIL_PER_MINUTE', 5))
+
+# Request metrics (see tasks/metrics.py), scraped from /api/metrics/
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 0.1))  # fraction of requests recorded
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', str(DEBUG)) == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # bearer token the scraper must send
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -0,0 +1,15 @@
+"""
+Settings for the test suite (`manage.py test` picks them up): the project
+settings plus a SQLite shard_1, so the sharding tests always have a second
+database to move users to. Tests that use it turn it on with
+override_settings(TASK_SHARDS=['default', 'shard_1']).
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+# Tests run on an in-memory copy; NAME is only used outside tests
+DATABASES.setdefault('shard_1', {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'shard_1.sqlite3',
+})
@@ -1,13 +1,13 @@
 from rest_framework import viewsets, permissions
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from .search import TaskSearchFilter
 
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter, OrderingFilter]
     filterset_fields = ['completed']
-    search_fields = ['title', 'description']
     ordering_fields = ['due_date', 'order']
     queryset = Task.objects.none()
 
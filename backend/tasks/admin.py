@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Task, CustomUser
+from .models import Task, CustomUser, CustomUserShard, OutboxEmail, ArchivedTask
 
 admin.site.register(Task)
-admin.site.register(CustomUser)
\ No newline at end of file
+admin.site.register(CustomUser)
+admin.site.register(OutboxEmail)
+admin.site.register(ArchivedTask)
+admin.site.register(CustomUserShard)
\ No newline at end of file
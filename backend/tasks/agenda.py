@@ -0,0 +1,59 @@
+# tasks/agenda.py
+
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Task
+from .serializers import serialize_task_values, task_values
+
+# Six weeks covers any month grid, leading and trailing days included
+CALENDAR_MAX_DAYS = 42
+
+
+def parse_calendar_range(start, end, time_zone):
+    """
+    Validate ?start=, ?end= (ISO dates, end inclusive) and ?tz= (IANA name).
+    Returns (start, end, zone) or raises ValueError with a message for the
+    client.
+    """
+    try:
+        start, end = date.fromisoformat(start or ''), date.fromisoformat(end or '')
+    except ValueError:
+        raise ValueError('start and end must be dates like 2026-03-01') from None
+    if end < start:
+        raise ValueError('end must not be before start')
+    if (end - start).days + 1 > CALENDAR_MAX_DAYS:
+        raise ValueError(f'At most {CALENDAR_MAX_DAYS} days per request')
+    try:
+        zone = ZoneInfo(time_zone or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f'Unknown time zone: {time_zone}') from None
+    return start, end, zone
+
+
+def tasks_by_day(user_id, start, end, zone):
+    """
+    A user's tasks due between start and end (inclusive, local dates in
+    zone), grouped into one bucket per day, oldest first.
+
+    The date range becomes a due_date range on the (user, due_date) index,
+    so only the rows shown are read, and TruncDate assigns each row its
+    local day in the database. Due dates are rendered in zone.
+    """
+    lower = datetime.combine(start, time.min, tzinfo=zone)
+    upper = datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone)
+    rows = (
+        task_values(Task.objects.for_user(user_id).filter(due_date__gte=lower, due_date__lt=upper))
+        .annotate(day=TruncDate('due_date', tzinfo=zone))
+        .order_by('due_date', 'order', 'id')
+    )
+
+    with timezone.override(zone):
+        tasks = serialize_task_values(rows)
+    buckets = {start + timedelta(days=i): [] for i in range((end - start).days + 1)}
+    for task in tasks:
+        buckets[task.pop('day')].append(task)
+    return [{'date': day.isoformat(), 'tasks': day_tasks} for day, day_tasks in buckets.items()]
@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from .authentication import invalidate_cached_user
+        from .caching import bump_task_version_for_instance
+        from .metrics import instrument_connection
+        from .search import reinstall_search_triggers
+        from .sharding import assign_shard, delete_user_tasks, prepare_shard
+        from .sync import record_tombstone
+        connection_created.connect(instrument_connection)
+        post_migrate.connect(reinstall_search_triggers, sender=self)
+        post_migrate.connect(prepare_shard, sender=self)
+        user_model = self.get_model('CustomUser')
+        post_save.connect(invalidate_cached_user, sender=user_model)
+        post_delete.connect(invalidate_cached_user, sender=user_model)
+        post_save.connect(assign_shard, sender=user_model)
+        pre_delete.connect(delete_user_tasks, sender=user_model)
+        task_model = self.get_model('Task')
+        post_save.connect(bump_task_version_for_instance, sender=task_model)
+        post_delete.connect(bump_task_version_for_instance, sender=task_model)
+        post_delete.connect(record_tombstone, sender=task_model)
@@ -0,0 +1,98 @@
+# tasks/archive.py
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.timezone import now
+
+from .caching import bump_task_version
+from .models import ArchivedTask, Task, TaskTombstone
+from .ordering import ORDER_GAP, next_order
+from .sharding import shard_for_user, task_shards
+
+# Columns copied between Task and ArchivedTask
+ARCHIVE_FIELDS = ['id', 'user_id', 'title', 'description', 'completed', 'due_date', 'order', 'completed_at']
+
+
+def archive_cutoff():
+    return now() - timedelta(days=settings.TASK_ARCHIVE_AFTER_DAYS)
+
+
+def archive_batch(cutoff, batch_size, using=DEFAULT_DB_ALIAS):
+    """
+    Move up to batch_size tasks completed before cutoff into ArchivedTask
+    on the `using` shard, in one short transaction. Returns the number moved.
+
+    skip_locked lets concurrent passes (and users editing a task) proceed
+    without waiting on each other on Postgres. The Task rows go through
+    a regular delete(), so sync clients get tombstones for them, reminders
+    are cascaded and the task list caches are invalidated.
+    """
+    with transaction.atomic(using=using):
+        rows = list(
+            Task.objects.using(using).select_for_update(skip_locked=True)
+            .filter(completed=True, completed_at__lt=cutoff)
+            .order_by('id')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedTask.objects.using(using).bulk_create([ArchivedTask(**row) for row in rows])
+        Task.objects.using(using).filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_completed_tasks(cutoff=None, batch_size=None, pause=0, max_batches=None):
+    """
+    Archive every task completed before cutoff (default: older than
+    TASK_ARCHIVE_AFTER_DAYS) in batches, one shard after the other, sleeping
+    `pause` seconds between batches to leave room for request traffic.
+    max_batches applies per shard. Returns the number archived.
+    """
+    cutoff = cutoff or archive_cutoff()
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    archived = 0
+    for alias in task_shards():
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            moved = archive_batch(cutoff, batch_size, using=alias)
+            archived += moved
+            batches += 1
+            if moved < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return archived
+
+
+def restore_tasks(user_id, ids):
+    """
+    Move archived tasks of user_id back into Task, keeping their ids. They
+    come back reopened, so the next archiving pass doesn't take them away
+    again, and are appended to the end of the list; the tombstones written
+    when they were archived go. Returns the restored ids.
+    """
+    db = shard_for_user(user_id)
+    with transaction.atomic(using=db):
+        rows = list(
+            ArchivedTask.objects.for_user(user_id).select_for_update()
+            .filter(id__in=ids)
+            .order_by('order', 'id')
+            .values(*ARCHIVE_FIELDS)
+        )
+        if not rows:
+            return []
+        order = next_order(user_id)
+        tasks = []
+        for row in rows:
+            tasks.append(Task(**{**row, 'order': order, 'completed': False, 'completed_at': None}))
+            order += ORDER_GAP
+        Task.objects.using(db).bulk_create(tasks)
+        restored = [task.id for task in tasks]
+        ArchivedTask.objects.using(db).filter(id__in=restored).delete()
+        # Archiving left tombstones; sync clients would drop the task again
+        TaskTombstone.objects.using(db).filter(user_id=user_id, task_id__in=restored).delete()
+        bump_task_version(user_id, using=db)
+    return restored
@@ -0,0 +1,82 @@
+# tasks/async_views.py
+#
+# Native async versions of the hot read endpoints. Under ASGI they run on
+# the event loop instead of queueing for the thread-sensitive sync adapter.
+# They mirror the sync views' output but skip DRF, which has no async
+# request handling.
+
+from datetime import timedelta
+from functools import wraps
+
+from django.http import JsonResponse
+from django.utils.timezone import now
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+
+from .authentication import aauthenticate
+from .metrics import span
+from .models import Task
+from .serializers import TaskSerializer
+
+ITERATOR_CHUNK_SIZE = 500
+
+
+def async_jwt_required(token_only=True):
+    """Authenticate an async view with a JWT, answering 401 like DRF does"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                with span('auth'):
+                    user = await aauthenticate(request, token_only=token_only)
+            except APIException as e:
+                return JsonResponse({'detail': e.detail}, status=401)
+            if user is None:
+                return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def _serialize(queryset):
+    tasks = [task async for task in queryset.aiterator(chunk_size=ITERATOR_CHUNK_SIZE)]
+    with span('serialize'):
+        return TaskSerializer(tasks, many=True).data
+
+
+@require_GET
+@async_jwt_required()
+async def task_list(request):
+    tasks = (await Task.objects.afor_user(request.user.id)).order_by('order', 'id')
+    return JsonResponse(await _serialize(tasks), safe=False)
+
+
+@require_GET
+@async_jwt_required()
+async def task_detail(request, pk):
+    try:
+        task = await (await Task.objects.afor_user(request.user.id)).aget(pk=pk)
+    except Task.DoesNotExist:
+        return JsonResponse({'detail': 'No Task matches the given query.'}, status=404)
+    return JsonResponse(TaskSerializer(task).data)
+
+
+@require_GET
+@async_jwt_required()
+async def upcoming_tasks(request):
+    soon = now() + timedelta(hours=24)
+    tasks = (await Task.objects.afor_user(request.user.id)).filter(
+        completed=False,
+        due_date__lte=soon
+    ).order_by('due_date')
+    return JsonResponse(await _serialize(tasks), safe=False)
+
+
+@require_GET
+@async_jwt_required(token_only=False)
+async def current_user(request):
+    return JsonResponse({
+        'username': request.user.username,
+        'email': request.user.email
+    })
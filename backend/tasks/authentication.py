@@ -0,0 +1,138 @@
+# tasks/authentication.py
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import span
+
+
+class UserCache:
+    """
+    Bounded per-process cache of user objects with a time-to-live.
+
+    Least recently used entries are evicted once max_size is reached, and
+    entries older than ttl seconds are treated as misses. Other processes
+    don't see invalidations, so ttl is also the longest a change made
+    elsewhere can go unnoticed.
+    """
+
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserCache(
+    max_size=getattr(settings, 'USER_CACHE_MAX_SIZE', 1024),
+    ttl=getattr(settings, 'USER_CACHE_TTL', 60),
+)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """post_save/post_delete hook for the user model"""
+    user_cache.invalidate(instance.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that reuses recently loaded users instead of running
+    a SELECT on every request.
+    """
+
+    def authenticate(self, request):
+        with span('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user.pk, user)
+        # Hand each request its own copy so a view mutating request.user
+        # can't leak into other requests sharing the cached instance
+        return copy.copy(user)
+
+
+class TokenOnlyJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticate from the token alone, without touching the database.
+
+    request.user is a TokenUser exposing only the id from the token, so this
+    is meant for endpoints that just scope queries by user id. Deactivated
+    users keep access until their access token expires.
+    """
+
+    def authenticate(self, request):
+        with span('auth'):
+            return super().authenticate(request)
+
+
+async def aauthenticate(request, token_only=False):
+    """
+    Async counterpart of the JWT authentication classes for plain Django
+    async views. Token checks are CPU-only; the user, when needed, comes
+    from user_cache or a single aget(). Returns None when no token was sent
+    and raises AuthenticationFailed/InvalidToken for bad ones.
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = authenticator.get_validated_token(raw_token)
+
+    if token_only:
+        return TokenOnlyJWTAuthentication().get_user(validated_token)
+
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    user = user_cache.get(user_id) if user_id is not None else None
+    if user is None:
+        try:
+            user = await authenticator.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except authenticator.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        user_cache.set(user.pk, user)
+    return copy.copy(user)
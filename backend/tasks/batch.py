@@ -0,0 +1,99 @@
+# tasks/batch.py
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from .caching import bump_task_version
+from .models import Task
+from .ordering import ORDER_GAP, next_order
+from .serializers import TaskSerializer
+from .sharding import shard_for_user
+
+
+def validate_batch(user_id, operations):
+    """
+    Check every operation against TaskSerializer rules and the user's tasks.
+
+    Returns (plan, errors): plan is a list of (op, instance, validated_data)
+    tuples, errors maps operation index -> error details. Targets of update
+    and delete are loaded in a single query.
+    """
+    target_ids = [item['id'] for item in operations if item['op'] != 'create']
+    tasks = Task.objects.for_user(user_id).filter(id__in=target_ids).in_bulk()
+
+    plan, errors, seen = [], {}, set()
+    for index, item in enumerate(operations):
+        op = item['op']
+        instance = None
+        if op != 'create':
+            instance = tasks.get(item['id'])
+            if instance is None:
+                errors[index] = {'id': ['Not found.']}
+                continue
+            if item['id'] in seen:
+                errors[index] = {'id': ['Task appears more than once in the batch.']}
+                continue
+            seen.add(item['id'])
+
+        if op == 'delete':
+            plan.append((op, instance, None))
+            continue
+
+        serializer = TaskSerializer(instance, data=item['data'], partial=op == 'update')
+        if serializer.is_valid():
+            plan.append((op, instance, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+    return plan, errors
+
+
+def apply_batch(user_id, plan):
+    """
+    Apply a validated plan in one transaction: a bulk_create for new tasks,
+    a bulk_update for edits and a single DELETE. Returns the per-operation
+    results in plan order.
+    """
+    stamp = now()
+    created, updated, deleted = [], [], []
+    update_fields = {'updated_at'}
+
+    db = shard_for_user(user_id)
+    with transaction.atomic(using=db):
+        order = next_order(user_id)
+        for op, instance, data in plan:
+            if op == 'create':
+                task = Task(user_id=user_id, order=order, updated_at=stamp, **data)
+                task.sync_completed_at(stamp)
+                created.append(task)
+                order += ORDER_GAP
+            elif op == 'update':
+                for field, value in data.items():
+                    setattr(instance, field, value)
+                instance.updated_at = stamp
+                instance.sync_completed_at(stamp)
+                update_fields.update(data)
+                if 'completed' in data:
+                    update_fields.add('completed_at')
+                updated.append(instance)
+            else:
+                deleted.append(instance.id)
+
+        if created:
+            Task.objects.using(db).bulk_create(created)
+        if updated:
+            Task.objects.using(db).bulk_update(updated, sorted(update_fields))
+        if deleted:
+            Task.objects.for_user(user_id).filter(id__in=deleted).delete()
+        bump_task_version(user_id, using=db)
+
+    results = []
+    created_iter = iter(created)
+    for op, instance, data in plan:
+        if op == 'create':
+            task = next(created_iter)
+            results.append({'op': op, 'status': 'created', 'id': task.id, 'task': TaskSerializer(task).data})
+        elif op == 'update':
+            results.append({'op': op, 'status': 'updated', 'id': instance.id, 'task': TaskSerializer(instance).data})
+        else:
+            results.append({'op': op, 'status': 'deleted', 'id': instance.id})
+    return results
@@ -0,0 +1,82 @@
+# tasks/caching.py
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import TaskListVersion
+
+BODY_KEY = 'tasks:body:{user_id}:{version}:{digest}'
+
+
+def get_task_version(user_id):
+    """Current version of a user's task list; 0 until their first write"""
+    return TaskListVersion.objects.for_user(user_id).values_list('version', flat=True).first() or 0
+
+
+def bump_task_version(user_id, using=None):
+    """
+    Invalidate every cached list and ETag of user_id.
+
+    The counter is a row next to the user's tasks (on `using`, their shard),
+    so every worker sees it, and it changes in the same transaction as the
+    write: a request that still reads the old rows also reads the old version.
+    """
+    versions = TaskListVersion.objects.for_user(user_id)
+    if using:
+        versions = versions.using(using)
+    if not versions.update(version=F('version') + 1):
+        # A new counter starts from the clock rather than 1, so it can never
+        # bring back a version (and ETag) a client has already seen
+        versions.get_or_create(user_id=user_id, defaults={'version': time.time_ns()})
+
+
+def bump_task_version_for_instance(sender, instance, **kwargs):
+    """post_save/post_delete hook for Task"""
+    bump_task_version(instance.user_id, using=instance._state.db)
+
+
+def cached_task_response(request, build_response, time_bucket=None):
+    """
+    Serve a task list with an ETag, answering If-None-Match with a 304 and
+    reusing cached bodies while the user's task version is unchanged.
+
+    build_response is only called on a miss. Pass time_bucket (seconds) for
+    lists that also depend on the current time, like upcoming tasks.
+    """
+    user_id = request.user.id
+    version = get_task_version(user_id)
+    parts = [request.build_absolute_uri(), request.accepted_media_type or '']
+    if time_bucket:
+        parts.append(str(int(time.time() // time_bucket)))
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    etag = f'W/"{version}-{digest[:16]}"'
+
+    if etag in _if_none_match(request):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        key = BODY_KEY.format(user_id=user_id, version=version, digest=digest)
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = build_response()
+            if response.status_code == status.HTTP_200_OK:
+                timeout = min(time_bucket, settings.TASK_LIST_CACHE_TIMEOUT) if time_bucket else settings.TASK_LIST_CACHE_TIMEOUT
+                cache.set(key, response.data, timeout=timeout)
+
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Accept', 'Authorization'])
+    return response
+
+
+def _if_none_match(request):
+    header = request.headers.get('If-None-Match', '')
+    return {tag.strip() for tag in header.split(',') if tag.strip()}
@@ -0,0 +1,18 @@
+# tasks/compression.py
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class ThresholdGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves responses smaller than GZIP_MIN_BYTES alone:
+    a single task or an empty list gains nothing from compression, a long
+    task list shrinks several times over. Streamed exports are always
+    compressed, since their size isn't known up front.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,56 @@
+# tasks/export.py
+
+import csv
+import json
+from itertools import chain
+
+from rest_framework import serializers
+
+# Same columns, in the same order, as TaskSerializer
+EXPORT_FIELDS = ['id', 'title', 'description', 'completed', 'due_date', 'order']
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() hands back the line csv.writer produced"""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset, fields):
+    # values_list + iterator() streams rows (through a server-side cursor on
+    # Postgres) without building model instances or caching the result set
+    due_date = fields.index('due_date')
+    to_representation = serializers.DateTimeField().to_representation
+    for row in queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if row[due_date] is not None:
+            row = row[:due_date] + (to_representation(row[due_date]),) + row[due_date + 1:]
+        yield row
+
+
+def export_lines(queryset, export_format, include_user=False):
+    """
+    Yield queryset as NDJSON or CSV text, one task per line, in constant
+    memory. queryset may also be a list of querysets (one per shard), read
+    one after the other. include_user adds the owning user's id as the
+    first column.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format: {export_format}')
+
+    fields = (['user_id'] if include_user else []) + EXPORT_FIELDS
+    querysets = queryset if isinstance(queryset, list) else [queryset]
+    rows = chain.from_iterable(_rows(queryset, fields) for queryset in querysets)
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row))) + '\n'
@@ -0,0 +1,133 @@
+# tasks/importer.py
+
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .caching import bump_task_version
+from .models import Task
+from .ordering import ORDER_GAP, next_order
+from .serializers import TaskSerializer
+from .sharding import shard_for_user
+
+IMPORT_FORMATS = ['ndjson', 'csv']
+IMPORT_CHUNK_SIZE = 1000
+# Every failed row is counted, but only this many are described in the report
+MAX_REPORTED_ERRORS = 100
+
+
+class RowError(Exception):
+    pass
+
+
+def guess_format(filename):
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return 'ndjson'
+
+
+def read_rows(binary_file, import_format):
+    """
+    Yield (line_number, row) pairs from an open binary file, one line at a
+    time. A row that can't be parsed is yielded as a RowError instead of a
+    dict so the caller can report it and carry on.
+    """
+    # Bytes that aren't UTF-8 are kept as lone surrogates and reported with
+    # their row, rather than ending the import halfway through the file
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', errors='surrogateescape', newline='')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                # DictReader.line_num is only updated after a good row
+                yield reader.reader.line_num, RowError(f'Invalid CSV: {e}')
+                continue
+            if not _is_utf8(*row, *(value for value in row.values() if isinstance(value, str))):
+                yield reader.line_num, RowError('Invalid UTF-8')
+                continue
+            # CSV has no null, so an empty cell means "not given"
+            yield reader.line_num, {key: value for key, value in row.items() if key and value != ''}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            if not _is_utf8(line):
+                yield line_number, RowError('Invalid UTF-8')
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f'Invalid JSON: {e}')
+                continue
+            if not isinstance(row, dict):
+                row = RowError('Expected a JSON object')
+            yield line_number, row
+
+
+def _is_utf8(*values):
+    try:
+        for value in values:
+            if value:
+                value.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def import_tasks(user_id, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate rows with TaskSerializer rules and insert the valid ones for
+    user_id with one bulk_create per chunk, appended after existing tasks.
+
+    Only one chunk is held in memory at a time. Invalid rows are skipped and
+    reported; they don't stop the rest of the file. Returns a summary dict.
+    """
+    summary = {'imported': 0, 'failed': 0, 'errors': []}
+    db = shard_for_user(user_id)
+    order = next_order(user_id)
+    rows = iter(rows)
+    # One serializer validates every row, the way ListSerializer drives its
+    # child, so fields are built once rather than per row
+    validator = TaskSerializer()
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        tasks = []
+        for line_number, row in chunk:
+            if isinstance(row, RowError):
+                errors = str(row)
+            else:
+                try:
+                    data = validator.run_validation(row)
+                except ValidationError as e:
+                    errors = e.detail
+                else:
+                    task = Task(user_id=user_id, order=order, **data)
+                    task.sync_completed_at()
+                    tasks.append(task)
+                    order += ORDER_GAP
+                    continue
+
+            summary['failed'] += 1
+            if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                summary['errors'].append({'line': line_number, 'errors': errors})
+
+        if tasks:
+            with transaction.atomic(using=db):
+                Task.objects.using(db).bulk_create(tasks)
+            summary['imported'] += len(tasks)
+
+    if summary['imported']:
+        bump_task_version(user_id, using=db)
+    return summary
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from tasks.archive import archive_completed_tasks
+
+
+class Command(BaseCommand):
+    help = "Move tasks completed more than TASK_ARCHIVE_AFTER_DAYS ago into the archive table, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, help="Override TASK_ARCHIVE_AFTER_DAYS")
+        parser.add_argument('--batch-size', type=int, help="Override TASK_ARCHIVE_BATCH_SIZE")
+        parser.add_argument('--pause', type=float, default=0.1, help="Seconds to sleep between batches")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches")
+
+    def handle(self, *args, **options):
+        cutoff = None
+        if options['older_than_days'] is not None:
+            cutoff = now() - timedelta(days=options['older_than_days'])
+        archived = archive_completed_tasks(
+            cutoff=cutoff,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} tasks"))
@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.models import CustomUser, Task
+from tasks.sharding import shard_for_user
+
+PASSWORD = 'benchmark-pass-123'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users x tasks in a throwaway test database, drive the main API endpoints "
+        "with concurrent clients and report throughput, latency percentiles and SQL query counts as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--tasks-per-user', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--endpoints', nargs='+', choices=list(self.scenarios()), default=list(self.scenarios()))
+        parser.add_argument('--output', '-o', help="Write the JSON report here as well as to stdout")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for comparable runs")
+
+    def handle(self, *args, **options):
+        # Never touch real data: run against a fresh test database, with the
+        # same environment tweaks the test runner applies (testserver host,
+        # locmem email)
+        setup_test_environment()
+        workdir = tempfile.TemporaryDirectory()
+        if connection.vendor == 'sqlite':
+            # A file rather than the shared-cache in-memory test database,
+            # which fails concurrent writers instead of making them wait
+            connection.settings_dict['TEST']['NAME'] = os.path.join(workdir.name, 'benchmark.sqlite3')
+            # Take the write lock when a transaction starts, so concurrent
+            # read-then-write transactions queue the way row locks make them
+            # on Postgres rather than failing with "database is locked"
+            connection.settings_dict['OPTIONS'].setdefault('transaction_mode', 'IMMEDIATE')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Failed requests are counted in the report; their tracebacks would
+        # only drown it out
+        request_logger = logging.getLogger('django.request')
+        request_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            report = self.run(options)
+        finally:
+            request_logger.setLevel(request_level)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            workdir.cleanup()
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+
+    def run(self, options):
+        self.random = random.Random(options['seed'])
+        started = time.perf_counter()
+        self.users = self.seed(options['users'], options['tasks_per_user'])
+        seed_seconds = time.perf_counter() - started
+
+        endpoints = {}
+        # Every simulated client shares one IP, so the login throttles would
+        # turn most of the auth scenarios into 429s
+        with override_settings(AUTH_THROTTLE_IP_BURST=0, AUTH_THROTTLE_EMAIL_BURST=0):
+            for name in options['endpoints']:
+                endpoints[name] = self.measure(self.scenarios()[name], options['requests'], options['concurrency'])
+
+        return {
+            'config': {
+                'users': options['users'],
+                'tasks_per_user': options['tasks_per_user'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'database': connection.vendor,
+                'seed_seconds': round(seed_seconds, 3),
+            },
+            'endpoints': endpoints,
+        }
+
+    def seed(self, user_count, tasks_per_user):
+        # Hash the password once; PBKDF2 per seeded user would dominate setup
+        password = make_password(PASSWORD)
+        stamp = time.time_ns()
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'bench{i}', email=f'bench-{stamp}-{i}@example.com', password=password)
+            for i in range(user_count)
+        ])
+        users = list(CustomUser.objects.filter(email__startswith=f'bench-{stamp}-').order_by('id'))
+
+        start = now()
+        for user in users:
+            Task.objects.using(shard_for_user(user.id)).bulk_create([
+                Task(
+                    user=user,
+                    title=f'Task {i}',
+                    description='Benchmark task' if i % 2 else None,
+                    completed=i % 5 == 0,
+                    due_date=start + timedelta(hours=i % 72) if i % 3 else None,
+                    order=(i + 1) * 1024,
+                )
+                for i in range(tasks_per_user)
+            ], batch_size=1000)
+
+        for user in users:
+            user.token = str(RefreshToken.for_user(user).access_token)
+            user.task_ids = list(Task.objects.for_user(user).values_list('id', flat=True))
+        return users
+
+    @classmethod
+    def scenarios(cls):
+        return {
+            'register': cls.register,
+            'login': cls.login,
+            'task_list': cls.task_list,
+            'task_create': cls.task_create,
+            'reorder': cls.reorder,
+            'upcoming': cls.upcoming,
+        }
+
+    def client_for(self, user=None):
+        client = APIClient(raise_request_exception=False)
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION='Bearer ' + user.token)
+        return client
+
+    def register(self, i):
+        return self.client_for().post(reverse('register'), {
+            'username': f'newuser{i}{time.time_ns()}',
+            'email': f'new-{i}-{time.time_ns()}@example.com',
+            'password': PASSWORD,
+        }, format='json')
+
+    def login(self, i):
+        user = self.users[i % len(self.users)]
+        return self.client_for().post(reverse('login'), {'email': user.email, 'password': PASSWORD}, format='json')
+
+    def task_list(self, i):
+        user = self.users[i % len(self.users)]
+        return self.client_for(user).get(reverse('task-list'))
+
+    def task_create(self, i):
+        user = self.users[i % len(self.users)]
+        return self.client_for(user).post(reverse('task-list'), {'title': f'Created {i}'}, format='json')
+
+    def reorder(self, i):
+        user = self.users[i % len(self.users)]
+        task_id, anchor = self.random.sample(user.task_ids, 2)
+        return self.client_for(user).patch(
+            reverse('reorder_tasks'), {'move': {'id': task_id, 'before': anchor}}, format='json'
+        )
+
+    def upcoming(self, i):
+        user = self.users[i % len(self.users)]
+        return self.client_for(user).get(reverse('upcoming_tasks'))
+
+    def timed(self, scenario, i):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = scenario(self, i)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries), response.status_code
+
+    def measure(self, scenario, count, concurrency):
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(lambda i: self.timed(scenario, i), range(count)))
+        else:
+            results = [self.timed(scenario, i) for i in range(count)]
+        wall = time.perf_counter() - started
+
+        latencies = sorted(elapsed for elapsed, _, _ in results)
+        queries = [count for _, count, _ in results]
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+
+        return {
+            'requests': len(results),
+            'errors': sum(1 for _, _, status in results if status >= 400),
+            'status_codes': dict(sorted(Counter(str(status) for _, _, status in results).items())),
+            'throughput_rps': round(len(results) / wall, 1),
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies) * 1000, 3),
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+            },
+            'queries': {
+                'mean': round(statistics.fmean(queries), 2),
+                'max': max(queries),
+            },
+        }
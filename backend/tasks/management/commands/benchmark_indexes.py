@@ -0,0 +1,103 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from tasks.models import CustomUser, Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Seed a large task dataset and check the hot Task queries use their indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--tasks-per-user', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows instead of rolling back")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        try:
+            with transaction.atomic():
+                user = self.seed(options['users'], options['tasks_per_user'])
+                failures = self.check_queries(user, options['repeat'])
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError("Queries not using their index: " + ", ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All hot queries use their indexes"))
+
+    def seed(self, user_count, tasks_per_user):
+        self.stdout.write(f"Seeding {user_count} users x {tasks_per_user} tasks...")
+        stamp = int(time.time())
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'bench{i}', email=f'bench-{stamp}-{i}@example.com')
+            for i in range(user_count)
+        ])
+        if not users[0].pk:
+            # Backends without RETURNING on bulk insert
+            users = list(CustomUser.objects.filter(email__startswith=f'bench-{stamp}-'))
+
+        start = now()
+        for user in users:
+            Task.objects.bulk_create([
+                Task(
+                    user=user,
+                    title=f'Task {i}',
+                    completed=i % 3 == 0,
+                    due_date=start + timedelta(hours=i % 96),
+                    order=i * 1024,
+                )
+                for i in range(tasks_per_user)
+            ], batch_size=1000)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE tasks_task')
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return users[len(users) // 2]
+
+    def hot_queries(self, user):
+        soon = now() + timedelta(hours=24)
+        return [
+            ('task list', 'task_user_order_idx',
+             Task.objects.filter(user=user).order_by('order', 'id')),
+            ('upcoming', 'task_user_open_due_idx',
+             Task.objects.filter(user=user, completed=False, due_date__lte=soon).order_by('due_date')),
+            ('calendar month', 'task_user_due_idx',
+             Task.objects.filter(user=user, due_date__gte=now(), due_date__lt=now() + timedelta(days=31))
+             .order_by('due_date', 'order', 'id')),
+        ]
+
+    def check_queries(self, user, repeat):
+        failures = []
+        for label, index_name, queryset in self.hot_queries(user):
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+
+            uses_index = index_name in plan
+            self.stdout.write(
+                f"{label}: median {timings[len(timings) // 2]:.2f} ms, "
+                f"index {index_name} {'used' if uses_index else 'NOT used'}"
+            )
+            if self.verbosity > 1:
+                self.stdout.write(plan)
+            if not uses_index:
+                failures.append(label)
+        return failures
@@ -0,0 +1,93 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.log import SamplingFilter, log_event, queued_handler
+
+DATA = {'username': 'bob', 'email': 'bob@example.com', 'password': 'secretpass123'}
+RESPONSE = {
+    'user': {'id': 1, 'username': 'bob', 'email': 'bob@example.com'},
+    'access': 'a' * 200,
+    'refresh': 'r' * 200,
+}
+
+
+class SlowStream:
+    """Stand-in for a stderr pipe or disk that blocks for a while on each write"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def write(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+def synchronous_logging(logger):
+    # What RegisterView used to do on every call
+    logger.info(f"Registration request received. Data: {DATA}")
+    logger.debug("Creating user...")
+    logger.info("User created successfully: bob@example.com")
+    logger.debug(f"Returning response: {RESPONSE}")
+
+
+def queued_logging(logger):
+    log_event(logger, logging.INFO, 'registration.received', data=DATA)
+    log_event(logger, logging.DEBUG, 'registration.creating_user')
+    log_event(logger, logging.INFO, 'registration.created', user_id=1, email='bob@example.com')
+    log_event(logger, logging.DEBUG, 'registration.response', response=RESPONSE)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the logging a registration request does, old f-strings with a synchronous "
+        "handler against structured events through the queue handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--write-latency-us', type=int, default=200, help="Simulated blocking time per write")
+        parser.add_argument('--debug-sample-rate', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        stream = SlowStream(options['write_latency_us'] / 1_000_000)
+        count = options['requests']
+
+        for level in (logging.INFO, logging.DEBUG):
+            old = logging.getLogger(f'benchmark.sync.{logging.getLevelName(level)}')
+            handler = logging.StreamHandler(stream)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+            self.attach(old, level, handler)
+
+            new = logging.getLogger(f'benchmark.queued.{logging.getLevelName(level)}')
+            queued = queued_handler()
+            queued.listener.handlers[0].setStream(stream)
+            queued.addFilter(SamplingFilter({'DEBUG': options['debug_sample_rate']}))
+            self.attach(new, level, queued)
+
+            try:
+                before = self.time(synchronous_logging, old, count)
+                after = self.time(queued_logging, new, count)
+            finally:
+                queued.listener.stop()
+            self.stdout.write(
+                f"{logging.getLevelName(level):5} synchronous {before:8.1f} us/request   "
+                f"queued {after:8.1f} us/request   ({before / after:.1f}x)"
+            )
+
+    @staticmethod
+    def attach(logger, level, handler):
+        logger.handlers = [handler]
+        logger.setLevel(level)
+        logger.propagate = False
+
+    @staticmethod
+    def time(log_request, logger, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            log_request(logger)
+        return (time.perf_counter() - started) / count * 1_000_000
@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import compress_string
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+
+from tasks.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+from tasks.serializers import _due_date_formatter
+
+
+def task_list_payload(count, description_bytes):
+    """The task list response body, as serialize_task_values() builds it"""
+    format_due_date = _due_date_formatter()
+    start = now()
+    return [
+        {
+            'id': i + 1,
+            'title': f'Task {i}',
+            'description': ('Lorem ipsum dolor sit amet ' * (description_bytes // 27 + 1))[:description_bytes] if i % 2 else None,
+            'completed': i % 3 == 0,
+            'due_date': format_due_date(start + timedelta(minutes=i)) if i % 4 else None,
+            'order': (i + 1) * 1024,
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time DRF's JSONRenderer against the orjson and MessagePack renderers on a task list "
+        "payload, with the response sizes before and after gzip"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000)
+        parser.add_argument('--description-bytes', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        data = task_list_payload(options['tasks'], options['description_bytes'])
+        renderers = [('JSONRenderer', JSONRenderer())]
+        if orjson:
+            renderers.append(('ORJSONRenderer', ORJSONRenderer()))
+        if msgpack:
+            renderers.append(('MessagePack', MessagePackRenderer()))
+
+        baseline = JSONRenderer().render(data)
+        if orjson and ORJSONRenderer().render(data) != baseline:
+            raise CommandError("ORJSONRenderer output differs from JSONRenderer")
+
+        results = {}
+        for label, renderer in renderers:
+            results[label] = self.best_of(options['repeat'], renderer.render, data)
+            body = renderer.render(data)
+            gzip_ms = self.best_of(options['repeat'], compress_string, body)
+            self.stdout.write(
+                f"{label:15} {results[label]:8.1f} ms   {len(body) / 1024:8.1f} KiB   "
+                f"gzip {len(compress_string(body)) / 1024:7.1f} KiB in {gzip_ms:6.1f} ms"
+            )
+
+        for label in results:
+            if label != 'JSONRenderer':
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label} renders {results['JSONRenderer'] / results[label]:.1f}x faster than JSONRenderer"
+                ))
+
+    @staticmethod
+    def best_of(repeat, function, *args):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function(*args)
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
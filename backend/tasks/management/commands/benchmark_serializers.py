@@ -0,0 +1,73 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import now
+
+from tasks.models import CustomUser, Task
+from tasks.serializers import TaskSerializer, serialize_task_values, task_values
+from tasks.sharding import shard_for_user
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Time TaskSerializer(many=True) against the read-only fast path on a seeded task list"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    username='benchmark', email=f'benchmark-{time.time_ns()}@example.com',
+                )
+                # The tasks live on the user's shard, which needs its own rollback
+                with transaction.atomic(using=shard_for_user(user.id)):
+                    self.run(user, options['tasks'], options['repeat'])
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, user, count, repeat):
+        start = now()
+        Task.objects.using(shard_for_user(user.id)).bulk_create([
+            Task(
+                user=user,
+                title=f'Task {i}',
+                description='Lorem ipsum dolor sit amet' if i % 2 else None,
+                completed=i % 3 == 0,
+                due_date=start + timedelta(minutes=i) if i % 4 else None,
+                order=i * 1024,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        tasks = Task.objects.for_user(user).order_by('order', 'id')
+
+        def serializer():
+            return TaskSerializer(tasks.all(), many=True).data
+
+        def fast_path():
+            return serialize_task_values(task_values(tasks.all()))
+
+        if [dict(row) for row in serializer()] != fast_path():
+            raise CommandError("Fast path output differs from TaskSerializer")
+
+        results = {}
+        for label, build in [('TaskSerializer', serializer), ('fast path', fast_path)]:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                build()
+                timings.append(time.perf_counter() - started)
+            results[label] = min(timings) * 1000
+            self.stdout.write(f"{label:15} {results[label]:8.1f} ms for {count} tasks (best of {repeat})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fast path is {results['TaskSerializer'] / results['fast path']:.1f}x faster"
+        ))
@@ -0,0 +1,115 @@
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.models import CustomUser, Task
+from tasks.sharding import shard_for_user
+
+SERVERS = {
+    'wsgi': lambda port, workers: [
+        'gunicorn', 'backend.wsgi:application', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+        '--log-level', 'warning',
+    ],
+    'asgi': lambda port, workers: [
+        'uvicorn', 'backend.asgi:application', '--port', str(port), '--workers', str(workers), '--log-level', 'warning',
+    ],
+}
+
+# (server, path) pairs to measure: the sync views under both servers and
+# the native async views under ASGI
+SCENARIOS = [
+    ('wsgi', '/api/tasks/'),
+    ('asgi', '/api/tasks/'),
+    ('asgi', '/api/async/tasks/'),
+    ('wsgi', '/api/upcoming/'),
+    ('asgi', '/api/upcoming/'),
+    ('asgi', '/api/async/upcoming/'),
+]
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent throughput of the task read endpoints under gunicorn (WSGI) and uvicorn (ASGI)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=200, help="Tasks seeded for the benchmark user")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per scenario")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--workers', type=int, default=1, help="Server worker processes")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--host', help="Host header to send (default: first entry of ALLOWED_HOSTS)")
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.create_user(
+            username='benchmark',
+            email=f'benchmark-{int(time.time())}@example.com',
+            password=None,
+        )
+        try:
+            Task.objects.using(shard_for_user(user.id)).bulk_create([
+                Task(user=user, title=f'Task {i}', order=i * 1024) for i in range(options['tasks'])
+            ])
+            token = str(RefreshToken.for_user(user).access_token)
+            self.host = options['host'] or self.default_host()
+            for server, path in SCENARIOS:
+                self.run_scenario(server, path, token, options)
+        finally:
+            user.delete()
+
+    def run_scenario(self, server, path, token, options):
+        command = SERVERS[server](options['port'], options['workers'])
+        if shutil.which(command[0]) is None:
+            self.stderr.write(f"{command[0]} not installed, skipping {server} {path}")
+            return
+
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=sys.stderr)
+        try:
+            self.wait_for_port(options['port'])
+            url = f"http://127.0.0.1:{options['port']}{path}"
+            self.request(url, token)  # warm up
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                latencies = sorted(pool.map(lambda _: self.request(url, token), range(options['requests'])))
+            elapsed = time.perf_counter() - started
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(
+            f"{server:4} {path:22} {options['requests'] / elapsed:8.1f} req/s  "
+            f"p50 {percentile(0.50):7.1f} ms  p95 {percentile(0.95):7.1f} ms  p99 {percentile(0.99):7.1f} ms"
+        )
+
+    def request(self, url, token):
+        request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}', 'Host': self.host})
+        started = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+        return time.perf_counter() - started
+
+    def default_host(self):
+        # The servers only answer to ALLOWED_HOSTS, so borrow one of those
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        host = host.rstrip('/')
+        return 'benchmark' + host if host.startswith('.') else host
+
+    def wait_for_port(self, port, timeout=20):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f"Server didn't start listening on port {port}")
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.export import EXPORT_FORMATS, export_lines
+from tasks.models import CustomUser, Task
+from tasks.sharding import task_shards
+
+
+class Command(BaseCommand):
+    help = "Stream tasks of every user (or one user) to a file as NDJSON or CSV, shard by shard"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--user', help="Only export the tasks of the user with this email")
+        parser.add_argument('--output', '-o', help="File to write to (default: stdout)")
+
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                user = CustomUser.objects.get(email=options['user'])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+            tasks = Task.objects.for_user(user).order_by('order', 'id')
+        else:
+            tasks = [Task.objects.using(alias).order_by('user_id', 'order', 'id') for alias in task_shards()]
+
+        lines = export_lines(tasks, options['export_format'], include_user=True)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        # The CSV header isn't a task
+        count = -1 if options['export_format'] == 'csv' else 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for line in lines:
+                out.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} tasks to {options['output']}"))
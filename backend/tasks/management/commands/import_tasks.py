@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importer import IMPORT_FORMATS, guess_format, import_tasks, read_rows
+from tasks.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Import tasks for a user from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help="Email of the user who will own the tasks")
+        parser.add_argument('--format', dest='import_format', choices=IMPORT_FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['user'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        import_format = options['import_format'] or guess_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as source:
+                summary = import_tasks(user.id, read_rows(source, import_format), options['chunk_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if summary['failed'] > len(summary['errors']):
+            self.stderr.write(f"... and {summary['failed'] - len(summary['errors'])} more")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['imported']} tasks, {summary['failed']} rows failed"
+        ))
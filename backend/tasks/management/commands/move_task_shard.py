@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.models import CustomUser
+from tasks.sharding import move_user, shard_for_user, task_shards
+
+
+class Command(BaseCommand):
+    help = "Move every task of a user (with reminders, tombstones and archive) to another shard"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Email of the user to move")
+        parser.add_argument('--to', required=True, dest='target', help="Alias of the target shard (see TASK_SHARDS)")
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['user'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+        if options['target'] not in task_shards():
+            raise CommandError(f"Unknown shard {options['target']}. Use one of: {', '.join(task_shards())}")
+
+        source = shard_for_user(user.id)
+        if source == options['target']:
+            self.stdout.write(f"{user.email} is already on {source}")
+            return
+        moved = move_user(user.id, options['target'])
+        counts = ', '.join(f'{name}: {count}' for name, count in moved.items())
+        self.stdout.write(self.style.SUCCESS(f"Moved {user.email} from {source} to {options['target']}: {counts}"))
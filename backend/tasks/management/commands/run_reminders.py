@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = "Send due-date reminders as deadlines approach (emails go through the outbox)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Send what's due now and exit")
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler()
+        while True:
+            sent, wait = scheduler.run_once()
+            if sent:
+                self.stdout.write(f"Sent {sent} reminders")
+            if options['once']:
+                if not sent:
+                    return
+                continue
+            time.sleep(wait)
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails in batches, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain what's due and exit instead of polling")
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds to sleep when the outbox is empty")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed")
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,26 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tasks.sharding import shard_report
+
+COLUMNS = ['shard', 'vendor', 'assigned_users', 'users', 'tasks', 'completed', 'archived']
+
+
+class Command(BaseCommand):
+    help = "Show how users and tasks are spread over TASK_SHARDS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        report = shard_report()
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(''.join(f'{column:>16}' for column in COLUMNS))
+        for row in report:
+            self.stdout.write(''.join(f'{row[column]:>16}' for column in COLUMNS))
+        totals = {column: sum(row[column] for row in report) for column in COLUMNS[2:]}
+        self.stdout.write(''.join(f'{value:>16}' for value in ['total', '', *totals.values()]))
@@ -0,0 +1,235 @@
+# tasks/metrics.py
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+PREFIX = 'task_manager'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, the shape Prometheus expects"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    In-process store of histograms keyed by (metric, labels).
+
+    One lock guards every update; an observation is a bisect and a few
+    additions, so contention stays negligible next to a request.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._metrics.get(key)
+            if histogram is None:
+                histogram = self._metrics[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def render(self):
+        """Prometheus text exposition format, version 0.0.4"""
+        with self._lock:
+            snapshot = sorted(
+                (name, labels, histogram.buckets, list(histogram.counts), histogram.sum, histogram.count)
+                for (name, labels), histogram in self._metrics.items()
+            )
+
+        lines = [
+            f'# HELP {PREFIX}_metrics_sample_rate Fraction of requests recorded in the histograms',
+            f'# TYPE {PREFIX}_metrics_sample_rate gauge',
+            f'{PREFIX}_metrics_sample_rate {settings.METRICS_SAMPLE_RATE}',
+        ]
+        described = set()
+        for name, labels, buckets, counts, total, count in snapshot:
+            metric = f'{PREFIX}_{name}'
+            if name not in described:
+                lines.append(f'# TYPE {metric} histogram')
+                described.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(labels)} {total}')
+            lines.append(f'{metric}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Timings collected while one sampled request is handled"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.spans = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper on every connection, timing queries of sampled requests"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """
+    connection_created hook. Connections are per thread, and async views run
+    their queries in sync_to_async threads; installing the wrapper on each
+    connection as it opens, and finding the request through the _current
+    context variable (which sync_to_async carries over), counts them all.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def span(name):
+    """
+    Add the time spent in the block to the current request's `name` span
+    (auth, serialize, ...). Does nothing for requests that aren't sampled.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.spans[name] = metrics.spans.get(name, 0.0) + time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, SQL query count, DB time, response size and spans per
+    view for a METRICS_SAMPLE_RATE fraction of requests. Unsampled requests
+    skip the instrumentation entirely.
+
+    With METRICS_SERVER_TIMING on, sampled responses carry the numbers in a
+    Server-Timing header, which browser dev tools show per request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, metrics)
+
+    @staticmethod
+    def sampled():
+        rate = settings.METRICS_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def record(self, request, response, metrics):
+        elapsed = time.perf_counter() - metrics.started
+        match = request.resolver_match
+        labels = {'view': match.view_name if match else 'unmatched', 'method': request.method}
+
+        registry.observe('request_duration_seconds', {**labels, 'status': response.status_code}, elapsed, LATENCY_BUCKETS)
+        registry.observe('db_queries', labels, metrics.queries, QUERY_BUCKETS)
+        registry.observe('db_duration_seconds', labels, metrics.db_time, LATENCY_BUCKETS)
+        for name, duration in metrics.spans.items():
+            registry.observe('span_duration_seconds', {**labels, 'span': name}, duration, LATENCY_BUCKETS)
+        if not response.streaming:
+            registry.observe('response_size_bytes', labels, len(response.content), SIZE_BUCKETS)
+
+        if settings.METRICS_SERVER_TIMING:
+            entries = [f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"']
+            entries += [f'{name};dur={duration * 1000:.2f}' for name, duration in metrics.spans.items()]
+            entries.append(f'total;dur={elapsed * 1000:.2f}')
+            response['Server-Timing'] = ', '.join(entries)
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Needs `Authorization: Bearer <METRICS_TOKEN>`
+    when a token is configured, and is only open without one under DEBUG.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
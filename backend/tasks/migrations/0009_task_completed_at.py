@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 05:58
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # The real completion time is unknown; the last edit is the best guess
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(completed=True).update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_taskreminder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['user', 'completed_at'], name='task_user_completed_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
+from asgiref.sync import sync_to_async
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 
@@ -14,14 +16,196 @@ class CustomUser(AbstractUser):
 
 
 
+class ShardedQuerySet(models.QuerySet):
+    """QuerySet of a per-user table that may live on any of TASK_SHARDS"""
+
+    def for_user(self, user):
+        """Rows of user (an instance or id), read from the shard that holds them"""
+        from .sharding import shard_for_user, task_shards
+        user_id = getattr(user, 'pk', user)
+        queryset = self.filter(user_id=user_id)
+        if len(task_shards()) > 1:
+            # Left to the routers otherwise, so reads can use a replica
+            queryset = queryset.using(shard_for_user(user_id))
+        return queryset
+
+    async def afor_user(self, user):
+        # The shard lookup may query the database
+        return await sync_to_async(self.for_user)(user)
+
+
+class CustomUserShard(models.Model):
+    """Which database (see TASK_SHARDS) holds a user's tasks"""
+    user = models.OneToOneField('CustomUser', on_delete=models.CASCADE, primary_key=True, related_name='shard')
+    alias = models.CharField(max_length=100)
+    assigned_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.alias}'
+
+
 class Task(models.Model):
-    user = models.ForeignKey('CustomUser', on_delete=models.CASCADE)
+    # Users live on the default database and tasks may live on another
+    # shard, so the foreign key can't be enforced by the database
+    user = models.ForeignKey('CustomUser', on_delete=models.CASCADE, db_constraint=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     completed = models.BooleanField(default=False)
     due_date = models.DateTimeField(null=True, blank=True)
     order = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
     # priority = models.IntegerField(default=4)  # or null=True
 
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Task list and cursor pagination: WHERE user_id = ? ORDER BY order, id
+            models.Index(fields=['user', 'order', 'id'], name='task_user_order_idx'),
+            # upcoming_tasks: open tasks of a user ordered by due date
+            models.Index(
+                fields=['user', 'due_date'],
+                name='task_user_open_due_idx',
+                condition=models.Q(completed=False),
+            ),
+            # Calendar: all tasks of a user due within a date range
+            models.Index(fields=['user', 'due_date'], name='task_user_due_idx'),
+            # Delta sync: tasks of a user changed since a point in time
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
+            # Reminder scheduler: open tasks across all users by due date
+            models.Index(
+                fields=['due_date'],
+                name='task_open_due_idx',
+                condition=models.Q(completed=False),
+            ),
+            # Stats: completions of a user per day
+            models.Index(
+                fields=['user', 'completed_at'],
+                name='task_user_completed_idx',
+                condition=models.Q(completed=True),
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def sync_completed_at(self, moment=None):
+        """Stamp completed_at when the task gets completed, clear it when reopened"""
+        if not self.completed:
+            self.completed_at = None
+        elif self.completed_at is None:
+            self.completed_at = moment or timezone.now()
+
+    def save(self, *args, **kwargs):
+        self.sync_completed_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'completed' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        super().save(*args, **kwargs)
+
+
+class ArchivedTask(models.Model):
+    """
+    Completed task moved out of the Task table by the archive_tasks job.
+    Keeps the task's id, so restoring it brings back the same task.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey('CustomUser', on_delete=models.CASCADE, db_constraint=False)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    completed = models.BooleanField(default=True)
+    due_date = models.DateTimeField(null=True, blank=True)
+    order = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'order', 'id'], name='archived_user_order_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title} (archived)'
+
+
+class TaskTombstone(models.Model):
+    """Record of a deleted task, so sync clients can drop their copy"""
+    user = models.ForeignKey('CustomUser', on_delete=models.CASCADE, db_constraint=False)
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'Task {self.task_id} (deleted)'
+
+
+class TaskListVersion(models.Model):
+    """Counter behind a user's task list ETags, bumped by every task write"""
+    user = models.OneToOneField(
+        'CustomUser', on_delete=models.CASCADE, primary_key=True, db_constraint=False, related_name='+'
+    )
+    version = models.BigIntegerField()
+
+    objects = ShardedQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.version}'
+
+
+class TaskReminder(models.Model):
+    """A reminder that went out for a task's due date"""
+    task = models.ForeignKey('Task', on_delete=models.CASCADE, related_name='reminders')
+    due_date = models.DateTimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # One reminder per deadline; moving the due date earns a new one
+            models.UniqueConstraint(fields=['task', 'due_date'], name='unique_task_reminder'),
+        ]
+
+    def __str__(self):
+        return f'Reminder for task {self.task_id} due {self.due_date}'
+
+
+class OutboxEmail(models.Model):
+    """Email waiting to be delivered by the send_outbox worker"""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Set for mail that must go out at most once, like task reminders
+    dedupe_key = models.CharField(max_length=100, null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            # The worker only ever looks for pending mail that's due
+            models.Index(
+                fields=['next_attempt_at'],
+                name='outbox_pending_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.subject} -> {", ".join(self.recipients)}'
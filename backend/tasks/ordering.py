@@ -0,0 +1,98 @@
+# tasks/ordering.py
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Value, When
+from django.utils.timezone import now
+
+from .caching import bump_task_version
+from .models import Task
+from .sharding import shard_for_user
+
+# Distance left between neighbouring tasks, so a card dropped between two
+# others can take the midpoint without touching any other row.
+ORDER_GAP = 1024
+
+
+def next_order(user):
+    """Order value that places a new task at the bottom of the user's list"""
+    last = Task.objects.for_user(user).aggregate(last=Max('order'))['last']
+    if last is None:
+        return ORDER_GAP
+    return last + ORDER_GAP
+
+
+def apply_order(user, orders):
+    """
+    Write explicit order values in a single UPDATE.
+
+    orders maps task id -> order. Ids that don't belong to user are ignored.
+    Returns the number of rows updated.
+    """
+    if not orders:
+        return 0
+    user_id = getattr(user, 'pk', user)
+    whens = [When(id=pk, then=Value(order)) for pk, order in orders.items()]
+    updated = Task.objects.for_user(user_id).filter(id__in=list(orders)).update(
+        order=Case(*whens, output_field=IntegerField()),
+        updated_at=now(),
+    )
+    if updated:
+        bump_task_version(user_id, using=shard_for_user(user_id))
+    return updated
+
+
+def rebalance(user):
+    """Respace every task of user ORDER_GAP apart, keeping the current order"""
+    ids = Task.objects.for_user(user).order_by('order', 'id').values_list('id', flat=True)
+    # Start one gap in, so there's always room to move a task to the top
+    return apply_order(user, {pk: (i + 1) * ORDER_GAP for i, pk in enumerate(ids)})
+
+
+def _neighbours(task, before=None, after=None):
+    """Return the (previous, next) tasks around the slot task is moving into"""
+    siblings = Task.objects.for_user(task.user_id).exclude(id=task.id)
+    if after is not None:
+        anchor = siblings.get(id=after)
+        following = siblings.filter(
+            Q(order__gt=anchor.order) | Q(order=anchor.order, id__gt=anchor.id)
+        ).order_by('order', 'id').first()
+        return anchor, following
+    anchor = siblings.get(id=before)
+    preceding = siblings.filter(
+        Q(order__lt=anchor.order) | Q(order=anchor.order, id__lt=anchor.id)
+    ).order_by('-order', '-id').first()
+    return preceding, anchor
+
+
+def _slot_between(previous, following):
+    """Order value strictly between the two neighbours, or None if there's no gap"""
+    if previous is None:
+        return following.order // 2 if following.order > 0 else None
+    if following is None:
+        return previous.order + ORDER_GAP
+    if following.order - previous.order > 1:
+        return (previous.order + following.order) // 2
+    return None
+
+
+def move_task(task, before=None, after=None):
+    """
+    Move task directly before or after another task of the same user.
+
+    Normally a single row is written. When the neighbours have no room
+    left between them the user's list is rebalanced first.
+    """
+    if (before is None) == (after is None):
+        raise ValueError('Provide exactly one of before or after')
+
+    with transaction.atomic(using=shard_for_user(task.user_id)):
+        previous, following = _neighbours(task, before=before, after=after)
+        order = _slot_between(previous, following)
+        if order is None:
+            rebalance(task.user_id)
+            previous, following = _neighbours(task, before=before, after=after)
+            order = _slot_between(previous, following)
+
+        task.order = order
+        task.save(update_fields=['order', 'updated_at'])
+    return task
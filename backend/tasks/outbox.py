@@ -0,0 +1,96 @@
+# tasks/outbox.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils.timezone import now
+
+from .models import OutboxEmail
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Store an email for the send_outbox worker; nothing is sent here"""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+        recipients=list(recipients),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base... capped at an hour"""
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+def claim_batch(batch_size):
+    """
+    Take up to batch_size due emails for this worker.
+
+    Claimed rows have their next attempt pushed past the lease, so other
+    workers skip them; skip_locked keeps workers from blocking each other
+    on Postgres. A worker that dies mid-batch leaves its rows to be retried
+    once the lease runs out.
+    """
+    lease = now() + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now())
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutboxEmail.objects.filter(id__in=[email.id for email in emails]).update(next_attempt_at=lease)
+    return emails
+
+
+def deliver_batch(batch_size=None, connection=None):
+    """
+    Send one batch of due emails over a single SMTP connection.
+
+    Failures are retried with backoff until OUTBOX_MAX_ATTEMPTS, then marked
+    failed. Returns (sent, failed) counts for the batch.
+    """
+    emails = claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Mail server unreachable: the whole batch counts as a failed attempt
+        for email in emails:
+            _record_failure(email, e)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(email.subject, email.body, email.from_email, email.recipients)
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    _record_failure(email, e)
+                    failed += 1
+                else:
+                    email.attempts += 1
+                    email.status = OutboxEmail.SENT
+                    email.sent_at = now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    OutboxEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, failed
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+    else:
+        email.next_attempt_at = now() + retry_delay(email.attempts)
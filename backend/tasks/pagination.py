@@ -1,8 +1,114 @@
 # tasks/pagination.py
 
-from rest_framework.pagination import PageNumberPagination
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class TaskPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class TaskCursorPagination(BasePagination):
+    """
+    Keyset pagination over (order, id).
+
+    Each page is fetched with a WHERE (order, id) > (last_order, last_id)
+    clause instead of an OFFSET, so the cost of a page doesn't grow with
+    its position and rows inserted or reordered behind the cursor never
+    shift the following pages.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by('order', 'id')
+        if position is not None:
+            order, pk = position
+            queryset = queryset.filter(Q(order__gt=order) | Q(order=order, id__gt=pk))
+
+        # Fetch one extra row to find out if there's a next page
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            return int(tokens['o'][0]), int(tokens['p'][0])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, order, pk):
+        querystring = parse.urlencode({'o': order, 'p': pk}, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        # Pages hold Task instances or the dict rows of task_values()
+        if isinstance(last, dict):
+            return self.encode_cursor(last['order'], last['id'])
+        return self.encode_cursor(last.order, last.id)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def get_task_paginator(request):
+    """
+    Pick the paginator a task list request asked for.
+
+    ?cursor= or ?limit= selects keyset pagination, ?page= or ?page_size=
+    keeps the page-number style for older clients, and a request with
+    neither gets the full list as before.
+    """
+    params = request.query_params
+    if TaskCursorPagination.cursor_query_param in params or TaskCursorPagination.page_size_query_param in params:
+        return TaskCursorPagination()
+    if TaskPagination.page_query_param in params or TaskPagination.page_size_query_param in params:
+        return TaskPagination()
+    return None
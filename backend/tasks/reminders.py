@@ -0,0 +1,155 @@
+# tasks/reminders.py
+
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, OuterRef
+from django.utils.timezone import now
+
+from .models import CustomUser, OutboxEmail, Task, TaskReminder
+from .sharding import task_shards
+
+
+def lead_time():
+    return timedelta(minutes=settings.REMINDER_LEAD_MINUTES)
+
+
+def grace_period():
+    return timedelta(minutes=settings.REMINDER_GRACE_MINUTES)
+
+
+def pending_reminders(moment, horizon, limit, using=DEFAULT_DB_ALIAS):
+    """
+    Open tasks on the `using` shard whose reminder falls before
+    moment + horizon and hasn't been sent for the current due date,
+    earliest first.
+
+    Deadlines that passed less than the grace period ago are included, so a
+    scheduler that was down catches up instead of skipping them.
+    """
+    already_sent = TaskReminder.objects.filter(task=OuterRef('pk'), due_date=OuterRef('due_date'))
+    return (
+        Task.objects.using(using).filter(
+            completed=False,
+            due_date__gt=moment - grace_period(),
+            due_date__lte=moment + lead_time() + horizon,
+        )
+        .exclude(Exists(already_sent))
+        .order_by('due_date')
+        .values_list('id', 'due_date')[:limit]
+    )
+
+
+def notification_for(task, email):
+    when = task.due_date.strftime('%Y-%m-%d %H:%M %Z')
+    return OutboxEmail(
+        subject=f'Reminder: "{task.title}" is due soon',
+        body=f'Your task "{task.title}" is due at {when}.',
+        from_email=settings.DEFAULT_FROM_EMAIL or '',
+        recipients=[email],
+        dedupe_key=f'reminder:{task.id}:{task.due_date.isoformat()}',
+    )
+
+
+def dispatch(entries, using=DEFAULT_DB_ALIAS):
+    """
+    Record and send reminders for (task_id, due_date) pairs of tasks on the
+    `using` shard in bulk.
+
+    Tasks completed or rescheduled since they were queued are skipped, and
+    tasks of users without an email are recorded without sending. The
+    reminder rows and their outbox emails are written in one transaction,
+    so a crash can't send without recording or record without sending.
+
+    When the shard isn't default those are two transactions, and the outbox
+    commits first: a crash in between leaves a queued email whose reminder
+    wasn't recorded. The reminder is then dispatched again, and its email's
+    dedupe_key keeps it from being queued twice. The tasks are locked first,
+    so a second scheduler skips them instead of emailing them again. Returns
+    the number of reminders sent.
+    """
+    expected = dict(entries)
+    # Users and the outbox live on default, so no join from another shard
+    with transaction.atomic(using=using), transaction.atomic():
+        tasks = [
+            task for task in (
+                Task.objects.using(using)
+                .select_for_update(skip_locked=True)
+                .filter(id__in=expected, completed=False)
+            )
+            if task.due_date == expected[task.id]
+        ]
+        emails = dict(
+            CustomUser.objects.using(DEFAULT_DB_ALIAS)
+            .filter(id__in={task.user_id for task in tasks})
+            .exclude(email='')
+            .values_list('id', 'email')
+        )
+        sent = set(
+            TaskReminder.objects.using(using).filter(task__in=tasks).values_list('task_id', 'due_date')
+        )
+        tasks = [task for task in tasks if (task.id, task.due_date) not in sent]
+        # Without ignore_conflicts: if a reminder was recorded anyway (a
+        # database without row locks), the emails are rolled back with it.
+        # Tasks whose user has no email (or is gone) are recorded as well,
+        # or pending_reminders() would hand them out again on every refill.
+        TaskReminder.objects.using(using).bulk_create(
+            [TaskReminder(task=task, due_date=task.due_date) for task in tasks]
+        )
+        tasks = [task for task in tasks if task.user_id in emails]
+        OutboxEmail.objects.bulk_create(
+            [notification_for(task, emails[task.user_id]) for task in tasks],
+            ignore_conflicts=True,
+        )
+    return len(tasks)
+
+
+class ReminderScheduler:
+    """
+    Keeps a heap of the next reminders due and fires them when their time
+    comes. The heap is refilled from pending_reminders() in time-ordered
+    batches, one per shard, and the TaskReminder table makes restarts safe.
+    """
+
+    def __init__(self, batch_size=None, horizon=None):
+        self.batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+        self.horizon = horizon or timedelta(seconds=settings.REMINDER_REFRESH_SECONDS)
+        self.heap = []
+        self.refreshed_at = None
+
+    def refill(self, moment):
+        self.heap = [
+            (due_date - lead_time(), task_id, due_date, alias)
+            for alias in task_shards()
+            for task_id, due_date in pending_reminders(moment, self.horizon, self.batch_size, using=alias)
+        ]
+        heapq.heapify(self.heap)
+        self.refreshed_at = moment
+
+    def run_once(self, moment=None):
+        """
+        Fire every reminder due at moment. Returns (sent, seconds until the
+        scheduler next has work).
+        """
+        moment = moment or now()
+        # Refill on schedule (new or edited tasks) and whenever the batch
+        # ran dry, in case more reminders were waiting behind it
+        if not self.heap or moment - self.refreshed_at >= self.horizon:
+            self.refill(moment)
+
+        due = defaultdict(list)
+        while self.heap and self.heap[0][0] <= moment:
+            _, task_id, due_date, alias = heapq.heappop(self.heap)
+            due[alias].append((task_id, due_date))
+        sent = sum(dispatch(entries, using=alias) for alias, entries in due.items())
+
+        next_refresh = self.refreshed_at + self.horizon
+        wake_at = min(self.heap[0][0], next_refresh) if self.heap else next_refresh
+        # Only come straight back when sending emptied the batch; if nothing
+        # could be sent, re-querying at once would just spin
+        if sent and not self.heap:
+            wake_at = moment
+        return sent, max((wake_at - moment).total_seconds(), 0)
@@ -0,0 +1,199 @@
+# tasks/routers.py
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import CustomUser
+from .sharding import current_shard, is_sharded, shard_for_user, task_shards
+
+PINNED_KEY = 'db:pinned:{user_id}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def replica_aliases():
+    return settings.DATABASE_REPLICAS
+
+
+def pin_to_primary(user_id):
+    """Send user_id's reads to the primary for REPLICA_STICKY_SECONDS"""
+    cache.set(PINNED_KEY.format(user_id=user_id), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(PINNED_KEY.format(user_id=user_id)) is not None
+
+
+class RoutingState:
+    """What the router knows about the request being handled"""
+
+    def __init__(self, request):
+        self.request = request
+        self.safe = request.method in SAFE_METHODS
+        self.wrote = False
+        self.replica = None
+        self._pinned = None
+
+    def user_id(self):
+        # Authentication happens inside the view (DRF, async_jwt_required),
+        # so look the user up at query time rather than at the start
+        user = getattr(self.request, 'user', None)
+        return user.id if user is not None and user.is_authenticated else None
+
+    def can_use_replica(self):
+        if not self.safe or self.wrote:
+            return False
+        if self._pinned is None:
+            user_id = self.user_id()
+            if user_id is None:
+                # Anonymous so far; auth lookups can't have been written by
+                # this client, and the answer may change once it's known
+                return True
+            self._pinned = is_pinned(user_id)
+        return not self._pinned
+
+
+class TaskShardRouter:
+    """
+    Send the per-user task tables to the shard that holds the user's rows
+    (see tasks/sharding.py), when there's more than one shard.
+
+    The shard comes from the instance being saved or followed (its own
+    database, or its user's shard), else from a surrounding use_shard()
+    block. Queries with neither must say where they go, usually through
+    Task.objects.for_user(); they fall through to the next router. Users
+    and the other tables always stay on default.
+    """
+
+    def _shard(self, model, hints):
+        if len(task_shards()) == 1:
+            return None
+        instance = hints.get('instance')
+        if not is_sharded(model):
+            # e.g. task.user: users live on default whichever shard the
+            # task was loaded from
+            if instance is not None and is_sharded(type(instance)):
+                return DEFAULT_DB_ALIAS
+            return None
+        if instance is not None and is_sharded(type(instance)):
+            if instance._state.db:
+                return instance._state.db
+            if getattr(instance, 'user_id', None) is not None:
+                return shard_for_user(instance.user_id)
+        elif isinstance(instance, CustomUser):
+            # user.task_set and friends
+            return shard_for_user(instance.pk)
+        return current_shard()
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # A task and its user may be on different databases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Shards get the full schema, so any model can be used anywhere
+        return None
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads made while handling GET/HEAD/OPTIONS requests to one of the
+    DATABASE_REPLICAS, and everything else to the primary (default).
+
+    Reads stay on the primary inside transactions, for the rest of a request
+    once it has written, and for REPLICA_STICKY_SECONDS after a request by
+    the same user wrote, so users always read their own writes. Users
+    themselves are always read from the primary. Management
+    commands and other code running outside a request only use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not replica_aliases():
+            return None
+        if model is CustomUser:
+            # Logins and token checks run before the user is known, so the
+            # pin can't help them: a just-registered account must be found
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or not state.can_use_replica():
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            # One replica per request, so its reads see a single snapshot
+            state.replica = self.choose_replica()
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in replica_aliases()
+
+    def choose_replica(self):
+        return random.choice(replica_aliases())
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Track the current request for PrimaryReplicaRouter, and pin its user to
+    the primary after a request that wrote.
+
+    The pin lives in Django's cache, which needs to be shared between
+    workers for stickiness to hold across them; settings require REDIS_URL
+    with replicas outside DEBUG.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(state)
+        return response
+
+    @staticmethod
+    def finish(state):
+        if state.wrote and replica_aliases():
+            user_id = state.user_id()
+            if user_id is not None:
+                pin_to_primary(user_id)
@@ -0,0 +1,156 @@
+# tasks/search.py
+
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+FTS_TABLE = 'tasks_task_fts'
+
+SQLITE_FTS_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, content='tasks_task', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+"""
+
+SQLITE_FTS_TRIGGERS = {
+    'tasks_task_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+    'tasks_task_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """,
+    'tasks_task_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update AFTER UPDATE OF title, description ON tasks_task BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+}
+
+# Title matches count ten times as much as description matches
+SQLITE_RANK = f"-bm25({FTS_TABLE}, 10.0, 1.0)"
+POSTGRES_RANK = "ts_rank(search_vector, to_tsquery('english', %s))"
+
+
+def ensure_sqlite_fts(conn):
+    """
+    Create the FTS5 index and its sync triggers if any of them are missing.
+
+    When a trigger had to be recreated the index may have missed writes, so
+    it's rebuilt from tasks_task.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in SQLITE_FTS_TRIGGERS if name not in existing]
+        if not missing:
+            return
+        cursor.execute(SQLITE_FTS_TABLE)
+        for name in missing:
+            cursor.execute(SQLITE_FTS_TRIGGERS[name])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def reinstall_search_triggers(using='default', **kwargs):
+    """post_migrate hook: Django drops triggers when it remakes an SQLite table"""
+    conn = connections[using]
+    if conn.vendor != 'sqlite' or FTS_TABLE not in conn.introspection.table_names():
+        return
+    ensure_sqlite_fts(conn)
+
+
+def search_terms(query):
+    """Split a user query into plain word tokens, dropping FTS operators"""
+    return re.findall(r'\w+', query.lower())
+
+
+_indexed_aliases = set()
+
+
+def has_search_index(conn=connection):
+    if conn.vendor == 'postgresql':
+        return True
+    if conn.vendor != 'sqlite':
+        return False
+    # Once the FTS table has been seen it isn't going away, so skip the
+    # introspection query on later searches
+    if conn.alias not in _indexed_aliases and FTS_TABLE in conn.introspection.table_names():
+        _indexed_aliases.add(conn.alias)
+    return conn.alias in _indexed_aliases
+
+
+def search_tasks(queryset, query):
+    """
+    Filter queryset to tasks matching every word of query, by prefix, and
+    annotate a relevance `rank` (higher is better).
+
+    Uses the tsvector/GIN index on Postgres and FTS5 on SQLite. Other
+    databases, and the unindexed archive table, fall back to icontains
+    with a constant rank.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+
+    conn = connections[queryset.db]
+    # The indexes and the SQL below belong to the tasks_task table
+    indexed = queryset.model._meta.db_table == 'tasks_task'
+    if indexed and conn.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.filter(
+            RawSQL("search_vector @@ to_tsquery('english', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(rank=RawSQL(POSTGRES_RANK, [tsquery], output_field=FloatField()))
+
+    if indexed and conn.vendor == 'sqlite' and has_search_index(conn):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rank = RawSQL(
+            f"SELECT {SQLITE_RANK} FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = tasks_task.id",
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(rank=rank)
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition).annotate(rank=RawSQL('1.0', [], output_field=FloatField()))
+
+
+class TaskSearchFilter(BaseFilterBackend):
+    """
+    Full-text ?search= for tasks, ranked by relevance.
+
+    Drop-in replacement for DRF's SearchFilter on title and description.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not search_terms(query):
+            return queryset
+        ordering = queryset.query.order_by
+        return search_tasks(queryset, query).order_by('-rank', *ordering)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Words to look for in title and description, matched by prefix.',
+            'schema': {'type': 'string'},
+        }]
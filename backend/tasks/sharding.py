@@ -0,0 +1,234 @@
+# tasks/sharding.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Q
+
+from .caching import bump_task_version
+from .models import ArchivedTask, CustomUserShard, Task, TaskListVersion, TaskReminder, TaskTombstone
+
+SHARD_KEY = 'shard:user:{user_id}'
+# Per-user tables; everything else (users, outbox, ...) stays on default
+SHARDED_MODELS = ('task', 'tasktombstone', 'taskreminder', 'archivedtask', 'tasklistversion')
+# Tables with their own id sequence. Shard k hands out ids from
+# k * SHARD_ID_SPAN up, so ids stay unique across shards and rows keep them
+# when a user is moved.
+SEQUENCED_TABLES = ('tasks_task', 'tasks_tasktombstone', 'tasks_taskreminder')
+SHARD_ID_SPAN = 2 ** 40
+MOVE_CHUNK_SIZE = 1000
+
+_override = ContextVar('task_shard', default=None)
+
+
+def task_shards():
+    return settings.TASK_SHARDS
+
+
+def is_sharded(model):
+    return model._meta.app_label == 'tasks' and model._meta.model_name in SHARDED_MODELS
+
+
+def _shard_key(user_id):
+    return SHARD_KEY.format(user_id=user_id)
+
+
+def shard_for_user(user_id):
+    """
+    Alias of the database holding user_id's tasks. The assignment is kept
+    in CustomUserShard on default and cached for TASK_SHARD_CACHE_TIMEOUT;
+    users without one (accounts from before sharding) are on default.
+    """
+    shards = task_shards()
+    if len(shards) == 1:
+        return shards[0]
+    key = _shard_key(user_id)
+    alias = cache.get(key)
+    if alias is None:
+        alias = (
+            CustomUserShard.objects.using(DEFAULT_DB_ALIAS)
+            .filter(user_id=user_id)
+            .values_list('alias', flat=True)
+            .first()
+        ) or DEFAULT_DB_ALIAS
+        cache.set(key, alias, timeout=settings.TASK_SHARD_CACHE_TIMEOUT)
+    return alias
+
+
+def set_user_shard(user_id, alias):
+    if alias not in task_shards():
+        raise ValueError(f'Unknown shard: {alias}')
+    CustomUserShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(user_id=user_id, defaults={'alias': alias})
+    cache.set(_shard_key(user_id), alias, timeout=settings.TASK_SHARD_CACHE_TIMEOUT)
+
+
+def current_shard():
+    """Shard chosen with use_shard()/user_shard() around the current code, if any"""
+    return _override.get()
+
+
+@contextmanager
+def use_shard(alias):
+    """
+    Route task queries that have nothing else to go by (Task.objects.create(),
+    bulk_create(), ...) to alias while the block runs.
+    """
+    token = _override.set(alias)
+    try:
+        yield alias
+    finally:
+        _override.reset(token)
+
+
+def user_shard(user_id):
+    return use_shard(shard_for_user(user_id))
+
+
+def assign_shard(sender, instance, created, raw=False, **kwargs):
+    """post_save hook for CustomUser: spread new accounts over TASK_SHARDS"""
+    shards = task_shards()
+    if created and not raw and len(shards) > 1:
+        set_user_shard(instance.pk, shards[instance.pk % len(shards)])
+
+
+def delete_user_tasks(sender, instance, **kwargs):
+    """
+    pre_delete hook for CustomUser. Deleting a user only cascades on the
+    database the user lives on, so clear out their rows on another shard.
+    """
+    if len(task_shards()) == 1:
+        return
+    alias = shard_for_user(instance.pk)
+    if alias != DEFAULT_DB_ALIAS:
+        with transaction.atomic(using=alias):
+            for model in (Task, TaskTombstone, ArchivedTask, TaskListVersion):
+                _delete_rows(model, alias, instance.pk)
+    cache.delete(_shard_key(instance.pk))
+
+
+def _delete_rows(model, alias, user_id):
+    # _raw_delete skips the delete signals: the tasks aren't gone from the
+    # user's point of view (or the user is), so no tombstones are recorded
+    if model is Task:
+        TaskReminder.objects.using(alias).filter(task__user_id=user_id)._raw_delete(alias)
+    return model.objects.using(alias).filter(user_id=user_id)._raw_delete(alias)
+
+
+def shard_id_range(alias):
+    """(exclusive lower, inclusive upper) bound of the ids alias allocates"""
+    index = task_shards().index(alias)
+    return index * SHARD_ID_SPAN, (index + 1) * SHARD_ID_SPAN
+
+
+def reset_shard_sequences(alias):
+    """
+    Point alias' id sequences just past the highest id it allocated itself,
+    ignoring rows that were moved in from other shards with their ids.
+    """
+    low, high = shard_id_range(alias)
+    conn = connections[alias]
+    with conn.cursor() as cursor:
+        for table in SEQUENCED_TABLES:
+            cursor.execute(f'SELECT MAX(id) FROM {table} WHERE id > %s AND id <= %s', [low, high])
+            last = cursor.fetchone()[0] or low
+            if conn.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, last])
+            elif conn.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, %s)",
+                    [table, max(last, 1), last > 0],
+                )
+
+
+def prepare_shard(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate hook: start a shard's sequences in its own id range"""
+    if len(task_shards()) > 1 and using in task_shards():
+        reset_shard_sequences(using)
+
+
+def move_user(user_id, target):
+    """
+    Move every task row of user_id (tasks, reminders, tombstones, archive)
+    to the target shard, keeping ids. Returns {model name: rows moved}.
+
+    The assignment is switched before copying, so new writes already land
+    on target, and switched back if the copy fails, which rolls back
+    everything copied. Once the copy has committed the rows are deleted
+    from the source. Run it while the user is idle, since a write that
+    started on the old shard just before the switch would be left behind.
+    """
+
+    source = shard_for_user(user_id)
+    if target not in task_shards():
+        raise ValueError(f'Unknown shard: {target}')
+    if source == target:
+        return {}
+
+    set_user_shard(user_id, target)
+    querysets = [
+        (Task, Task.objects.using(source).filter(user_id=user_id)),
+        (TaskReminder, TaskReminder.objects.using(source).filter(task__user_id=user_id)),
+        (TaskTombstone, TaskTombstone.objects.using(source).filter(user_id=user_id)),
+        (ArchivedTask, ArchivedTask.objects.using(source).filter(user_id=user_id)),
+    ]
+    moved = {}
+    try:
+        with transaction.atomic(using=target), transaction.atomic(using=source):
+            for model, queryset in querysets:
+                moved[model._meta.model_name] = _copy_rows(model, queryset.order_by('pk'), target)
+    except Exception:
+        set_user_shard(user_id, source)
+        raise
+    # Everything is on target by now: if this fails, the leftovers on
+    # source are unreachable copies rather than lost rows
+    with transaction.atomic(using=source):
+        for model in (Task, TaskTombstone, ArchivedTask, TaskListVersion):
+            _delete_rows(model, source, user_id)
+    reset_shard_sequences(target)
+    # Starts the counter on target from the clock, past any version served before
+    bump_task_version(user_id, using=target)
+    return moved
+
+
+def _copy_rows(model, queryset, target):
+    fields = [field.attname for field in model._meta.concrete_fields]
+    copied = 0
+    chunk = []
+    for row in queryset.values(*fields).iterator(chunk_size=MOVE_CHUNK_SIZE):
+        chunk.append(model(**row))
+        if len(chunk) == MOVE_CHUNK_SIZE:
+            copied += len(model.objects.using(target).bulk_create(chunk))
+            chunk = []
+    if chunk:
+        copied += len(model.objects.using(target).bulk_create(chunk))
+    return copied
+
+
+def shard_report():
+    """Per-shard row counts for the task tables, for admins"""
+
+    assigned = dict(
+        CustomUserShard.objects.using(DEFAULT_DB_ALIAS)
+        .values_list('alias')
+        .annotate(count=Count('user_id'))
+        .order_by()
+    )
+    report = []
+    for alias in task_shards():
+        counts = Task.objects.using(alias).aggregate(
+            tasks=Count('id'),
+            completed=Count('id', filter=Q(completed=True)),
+            users=Count('user_id', distinct=True),
+        )
+        report.append({
+            'shard': alias,
+            'vendor': connections[alias].vendor,
+            'assigned_users': assigned.get(alias, 0),
+            **counts,
+            'archived': ArchivedTask.objects.using(alias).count(),
+        })
+    return report
@@ -0,0 +1,70 @@
+# tasks/stats.py
+
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Task
+
+STATS_DEFAULT_DAYS = 14
+STATS_MAX_DAYS = 90
+
+
+def _start_of_day(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def task_counts(user_id, moment=None):
+    """
+    Total, completed, overdue and due-today counts of a user's tasks in one
+    query, each count a conditional aggregate over the same rows. An open
+    task due earlier today counts as both overdue and due today.
+    """
+    moment = moment or timezone.now()
+    today = timezone.localdate(moment)
+    # Aliases can't shadow the completed field the filters refer to
+    counts = Task.objects.for_user(user_id).aggregate(
+        total_count=Count('id'),
+        completed_count=Count('id', filter=Q(completed=True)),
+        overdue_count=Count('id', filter=Q(completed=False, due_date__lt=moment)),
+        due_today_count=Count('id', filter=Q(
+            completed=False,
+            due_date__gte=_start_of_day(today),
+            due_date__lt=_start_of_day(today + timedelta(days=1)),
+        )),
+    )
+    return {name.removesuffix('_count'): value for name, value in counts.items()}
+
+
+def completions_per_day(user_id, days, moment=None):
+    """
+    Tasks completed on each of the last `days` days, today included, oldest
+    first. Days are bucketed by the database in the current time zone and
+    days without completions are filled in with 0.
+    """
+    today = timezone.localdate(moment or timezone.now())
+    first = today - timedelta(days=days - 1)
+    rows = (
+        Task.objects.for_user(user_id).filter(completed=True, completed_at__gte=_start_of_day(first))
+        .annotate(day=TruncDate('completed_at'))
+        .values('day')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    counts = {row['day']: row['count'] for row in rows}
+    return [
+        {'date': day.isoformat(), 'count': counts.get(day, 0)}
+        for day in (first + timedelta(days=i) for i in range(days))
+    ]
+
+
+def task_summary(user_id, days=STATS_DEFAULT_DAYS, moment=None):
+    moment = moment or timezone.now()
+    counts = task_counts(user_id, moment)
+    return {
+        **counts,
+        'open': counts['total'] - counts['completed'],
+        'completed_per_day': completions_per_day(user_id, days, moment),
+    }
@@ -0,0 +1,75 @@
+# tasks/sync.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils.timezone import now
+
+from .models import CustomUser, Task, TaskTombstone
+from .sharding import task_shards
+
+# Rows are stamped when they're written but only become visible on commit,
+# so a slow transaction can land just behind a token handed out in the
+# meantime. Re-sending this much history covers it; clients upsert by id.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def encode_sync_token(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_sync_token(token):
+    """Return the datetime a token stands for, or raise ValueError"""
+    micros = int(token)
+    if micros < 0:
+        raise ValueError('Negative sync token')
+    return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc)
+
+
+def tombstone_retention():
+    return timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+
+
+def changes_since(user_id, since=None):
+    """
+    Collect a user's task changes since a sync token's moment.
+
+    Returns (tasks, deleted_ids, token, reset). When since is None, or older
+    than the tombstones we keep, every task is returned with reset=True and
+    the client should replace its copy instead of merging into it.
+    """
+    started = now()
+    reset = since is None or since < started - tombstone_retention()
+
+    tasks = Task.objects.for_user(user_id)
+    deleted = []
+    if not reset:
+        window = since - SYNC_OVERLAP
+        tasks = tasks.filter(updated_at__gte=window)
+        deleted = list(
+            TaskTombstone.objects.for_user(user_id).filter(deleted_at__gte=window)
+            .values_list('task_id', flat=True)
+            .distinct()
+        )
+    return tasks.order_by('order', 'id'), deleted, encode_sync_token(started), reset
+
+
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """post_delete hook for Task"""
+    # Nothing to sync once the whole account is gone, and the tombstone
+    # would point at a user that's being deleted in the same pass
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if issubclass(origin_model, CustomUser):
+        return
+    TaskTombstone.objects.using(instance._state.db).create(user_id=instance.user_id, task_id=instance.id)
+
+
+def prune_tombstones():
+    """Delete tombstones older than the retention window on every shard; returns the count"""
+    cutoff = now() - tombstone_retention()
+    deleted = 0
+    for alias in task_shards():
+        count, _ = TaskTombstone.objects.using(alias).filter(deleted_at__lt=cutoff).delete()
+        deleted += count
+    return deleted
@@ -1,10 +1,52 @@
-from django.test import TestCase
+import csv
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.db import IntegrityError, connection
+from django.db.models import F
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Task, CustomUser
-from datetime import timedelta
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from .models import Task, CustomUser, CustomUserShard, TaskTombstone, OutboxEmail, TaskReminder, ArchivedTask, TaskListVersion
+from .serializers import TaskSerializer, serialize_task_values, task_values
+from .importer import import_tasks
+from .outbox import deliver_batch, enqueue_email
+from .utils import send_verification_email
+from .reminders import ReminderScheduler, pending_reminders
+from .authentication import UserCache, user_cache
+from .metrics import registry as metrics_registry
+from .throttling import bucket_store
+from .log import SamplingFilter, StructuredFormatter, queued_handler
+from .stats import task_counts, task_summary
+from .archive import archive_completed_tasks
+from .routers import PrimaryReplicaRouter, TaskShardRouter
+from .renderers import ORJSONParser, ORJSONRenderer, msgpack, orjson
+from .sharding import (
+    move_user, reset_shard_sequences, set_user_shard, shard_for_user, shard_id_range, shard_report,
+    use_shard, user_shard,
+)
+from .management.commands.benchmark_api import Command as BenchmarkApiCommand
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.utils.translation import gettext_lazy
+from unittest import mock, skipUnless
 from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
 
 # Define the URLs
 REGISTER_URL = reverse('register')
@@ -17,6 +59,14 @@ def get_token(client, email, password):
     return res.data['access']
 
 
+def create_authenticated_client(user):
+    """Helper function to build a client carrying a JWT for user"""
+    client = APIClient()
+    token = RefreshToken.for_user(user).access_token
+    client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token))
+    return client
+
+
 class TaskApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -109,4 +159,1540 @@ class TaskApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['title'], 'Due Soon')
\ No newline at end of file
+        self.assertEqual(res.data[0]['title'], 'Due Soon')
+
+
+class TaskPaginationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='pager',
+            email='pager@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        for i in range(5):
+            Task.objects.create(user=self.user, title=f'Task {i}', order=i)
+
+    def test_list_without_params_is_unpaginated(self):
+        """Test the plain list is returned when no pagination is requested"""
+        res = self.client.get(TASKS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+
+    def test_cursor_pagination_walks_all_tasks(self):
+        """Test following next links returns every task exactly once"""
+        res = self.client.get(TASKS_URL, {'limit': 2})
+        titles = [task['title'] for task in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            titles += [task['title'] for task in res.data['results']]
+        self.assertEqual(titles, [f'Task {i}' for i in range(5)])
+
+    def test_cursor_is_stable_when_tasks_are_inserted(self):
+        """Test inserting a task before the cursor doesn't shift the next page"""
+        res = self.client.get(TASKS_URL, {'limit': 2})
+        Task.objects.create(user=self.user, title='Inserted', order=0)
+        res = self.client.get(res.data['next'])
+        self.assertEqual(
+            [task['title'] for task in res.data['results']],
+            ['Task 2', 'Task 3']
+        )
+
+    def test_cursor_breaks_order_ties_by_id(self):
+        """Test tasks sharing an order value are paged by id"""
+        Task.objects.filter(user=self.user).update(order=0)
+        res = self.client.get(TASKS_URL, {'limit': 3})
+        res = self.client.get(res.data['next'])
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNone(res.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test a garbled cursor is rejected"""
+        res = self.client.get(TASKS_URL, {'cursor': 'not-a-cursor'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_fallback(self):
+        """Test page-number pagination still works for older clients"""
+        res = self.client.get(TASKS_URL, {'page': 2, 'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 5)
+        self.assertEqual(
+            [task['title'] for task in res.data['results']],
+            ['Task 2', 'Task 3']
+        )
+
+
+class TaskReorderTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='mover',
+            email='mover@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.reorder_url = reverse('reorder_tasks')
+
+    def create_tasks(self, count):
+        for i in range(count):
+            self.client.post(TASKS_URL, {'title': f'Task {i}'})
+        return list(Task.objects.filter(user=self.user).order_by('order', 'id'))
+
+    def titles(self):
+        return list(Task.objects.filter(user=self.user).order_by('order', 'id').values_list('title', flat=True))
+
+    def test_new_tasks_are_appended_with_gaps(self):
+        """Test created tasks go to the bottom, spaced apart"""
+        tasks = self.create_tasks(3)
+        orders = [task.order for task in tasks]
+        self.assertEqual(orders, sorted(orders))
+        self.assertGreater(orders[1] - orders[0], 1)
+
+    def test_move_task_writes_one_row(self):
+        """Test moving a task between two others only updates that task"""
+        first, second, third = self.create_tasks(3)
+        payload = {'move': {'id': third.id, 'after': first.id}}
+
+        res = self.client.patch(self.reorder_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(), ['Task 0', 'Task 2', 'Task 1'])
+        first_order, second_order = first.order, second.order
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.order, second.order), (first_order, second_order))
+
+    def test_move_task_to_top(self):
+        """Test moving a task before the first one"""
+        first, second, third = self.create_tasks(3)
+        payload = {'move': {'id': third.id, 'before': first.id}}
+
+        res = self.client.patch(self.reorder_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(), ['Task 2', 'Task 0', 'Task 1'])
+
+    def test_move_task_rebalances_when_gap_runs_out(self):
+        """Test a move into a full gap respaces the list"""
+        first, second, third = self.create_tasks(3)
+        Task.objects.filter(id=first.id).update(order=5)
+        Task.objects.filter(id=second.id).update(order=6)
+        payload = {'move': {'id': third.id, 'before': second.id}}
+
+        res = self.client.patch(self.reorder_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(), ['Task 0', 'Task 2', 'Task 1'])
+
+    def test_move_task_requires_one_anchor(self):
+        """Test a move without before or after is rejected"""
+        first, = self.create_tasks(1)
+        res = self.client.patch(self.reorder_url, {'move': {'id': first.id}}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_move_task_rejects_malformed_moves(self):
+        """Test a move that isn't an object with integer ids is a 400, not a 500"""
+        first, second = self.create_tasks(2)
+        for move in (5, 'abc', {'id': 'abc', 'before': second.id}, {'id': first.id, 'after': 'x'}):
+            res = self.client.patch(self.reorder_url, {'move': move}, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, move)
+
+    def test_bulk_reorder_ignores_other_users_tasks(self):
+        """Test the bulk path can't touch another user's tasks"""
+        other = CustomUser.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        foreign = Task.objects.create(user=other, title='Foreign', order=7)
+        payload = {'task_order': [{'id': foreign.id, 'order': 99}]}
+
+        res = self.client.patch(self.reorder_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.order, 7)
+
+
+class TaskIndexTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        """Test the benchmark command finds the list and upcoming indexes in the query plan"""
+        out = StringIO()
+        call_command('benchmark_indexes', users=5, tasks_per_user=50, repeat=1, stdout=out)
+        self.assertIn('All hot queries use their indexes', out.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='searcher',
+            email='searcher@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        Task.objects.create(user=self.user, title='Plan team meeting', order=0)
+        Task.objects.create(user=self.user, title='Buy groceries', description='Milk for the meeting', order=1)
+        Task.objects.create(user=self.user, title='Write report', order=2)
+
+    def search(self, query):
+        res = self.client.get(TASKS_URL, {'search': query})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [task['title'] for task in res.data]
+
+    def test_search_ranks_title_matches_first(self):
+        """Test a title match outranks a description match"""
+        self.assertEqual(self.search('meeting'), ['Plan team meeting', 'Buy groceries'])
+
+    def test_search_matches_prefixes(self):
+        """Test partial words match by prefix"""
+        self.assertEqual(self.search('rep'), ['Write report'])
+
+    def test_search_requires_every_word(self):
+        """Test all words in the query must match"""
+        self.assertEqual(self.search('team plan'), ['Plan team meeting'])
+        self.assertEqual(self.search('team groceries'), [])
+
+    def test_search_ignores_fts_syntax(self):
+        """Test operators in the query are treated as plain words"""
+        self.assertEqual(self.search('"write" OR *'), [])
+        self.assertEqual(self.search('write*'), ['Write report'])
+
+    def test_search_index_follows_updates(self):
+        """Test edited and deleted tasks are reflected in results"""
+        task = Task.objects.get(title='Write report')
+        task.title = 'Write summary'
+        task.save()
+        self.assertEqual(self.search('summary'), ['Write summary'])
+        self.assertEqual(self.search('report'), [])
+        task.delete()
+        self.assertEqual(self.search('summary'), [])
+
+    def test_search_is_scoped_to_user(self):
+        """Test other users' tasks never show up"""
+        other = CustomUser.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        Task.objects.create(user=other, title='Secret meeting', order=0)
+        self.assertNotIn('Secret meeting', self.search('meeting'))
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='cached',
+            email='cached@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.user_url = reverse('current-user')
+
+    def test_repeat_requests_skip_user_query(self):
+        """Test the user is loaded once and then served from the cache"""
+        self.client.get(self.user_url)
+        with self.assertNumQueries(0):
+            res = self.client.get(self.user_url)
+        self.assertEqual(res.data['email'], 'cached@example.com')
+
+    def test_saving_user_invalidates_cache(self):
+        """Test a saved user is reloaded on the next request"""
+        self.client.get(self.user_url)
+        self.user.username = 'renamed'
+        self.user.save()
+        res = self.client.get(self.user_url)
+        self.assertEqual(res.data['username'], 'renamed')
+
+    def test_cache_evicts_expired_and_least_recent_entries(self):
+        """Test the TTL and size bound"""
+        cache = UserCache(max_size=2, ttl=60)
+        cache.set(1, 'one')
+        cache.set(2, 'two')
+        cache.get(1)
+        cache.set(3, 'three')
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), 'one')
+
+        with mock.patch('tasks.authentication.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get(1))
+
+    def test_task_endpoints_authenticate_from_token_only(self):
+        """Test id-only endpoints don't look up the user at all"""
+        Task.objects.create(user=self.user, title='Task', order=0)
+        # The list version, then the tasks
+        with self.assertNumQueries(2):
+            res = self.client.get(TASKS_URL)
+        self.assertEqual(len(res.data), 1)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('upcoming_tasks'))
+
+
+class TaskListCachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='poller',
+            email='poller@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.task = Task.objects.create(user=self.user, title='Task', order=0)
+
+    def test_matching_etag_returns_304_from_the_version_counter(self):
+        """Test a repeat poll with If-None-Match only reads the version counter"""
+        res = self.client.get(TASKS_URL)
+        etag = res['ETag']
+        with self.assertNumQueries(1):
+            res = self.client.get(TASKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_body_is_reused(self):
+        """Test a poll without an ETag is served from the cache"""
+        first = self.client.get(TASKS_URL)
+        with self.assertNumQueries(1):
+            second = self.client.get(TASKS_URL)
+        self.assertEqual(first.data, second.data)
+
+    def test_writes_change_the_etag(self):
+        """Test create, update, reorder and delete all invalidate the list"""
+        etag = self.client.get(TASKS_URL)['ETag']
+        writes = [
+            lambda: self.client.post(TASKS_URL, {'title': 'Another'}),
+            lambda: self.client.patch(reverse('task-detail', args=[self.task.id]), {'completed': True}),
+            lambda: self.client.patch(
+                reverse('reorder_tasks'),
+                {'task_order': [{'id': self.task.id, 'order': 5}]},
+                format='json'
+            ),
+            lambda: self.client.delete(reverse('task-detail', args=[self.task.id])),
+        ]
+        for write in writes:
+            write()
+            res = self.client.get(TASKS_URL, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res['ETag'], etag)
+            etag = res['ETag']
+
+    def test_version_is_shared_by_workers(self):
+        """Test the version lives in the database, not the per-process cache"""
+        etag = self.client.get(TASKS_URL)['ETag']
+        cache.clear()
+        res = self.client.get(TASKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        TaskListVersion.objects.filter(user=self.user).update(version=F('version') + 1)
+        res = self.client.get(TASKS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query(self):
+        """Test different query strings don't share an ETag"""
+        etag = self.client.get(TASKS_URL)['ETag']
+        res = self.client.get(TASKS_URL, {'search': 'task'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_upcoming_supports_etags(self):
+        """Test upcoming tasks answer 304 while nothing changed"""
+        url = reverse('upcoming_tasks')
+        etag = self.client.get(url)['ETag']
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class TaskSyncTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='syncer',
+            email='syncer@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.changes_url = reverse('task-changes')
+        self.old = Task.objects.create(user=self.user, title='Old', order=0)
+        self.edited = Task.objects.create(user=self.user, title='Edited', order=1)
+        self.removed = Task.objects.create(user=self.user, title='Removed', order=2)
+        Task.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def test_initial_sync_returns_everything(self):
+        """Test a sync without a token is a full reset"""
+        res = self.client.get(self.changes_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['reset'])
+        self.assertEqual(len(res.data['changed']), 3)
+        self.assertTrue(res.data['token'])
+
+    def test_sync_returns_only_changes(self):
+        """Test edits, creations and deletions since the token are reported"""
+        token = self.client.get(self.changes_url).data['token']
+        self.client.patch(reverse('task-detail', args=[self.edited.id]), {'completed': True})
+        self.client.post(TASKS_URL, {'title': 'New'})
+        self.client.delete(reverse('task-detail', args=[self.removed.id]))
+
+        res = self.client.get(self.changes_url, {'since': token})
+        self.assertFalse(res.data['reset'])
+        self.assertEqual(
+            sorted(task['title'] for task in res.data['changed']),
+            ['Edited', 'New']
+        )
+        self.assertEqual(res.data['deleted'], [self.removed.id])
+
+    def test_reorder_counts_as_a_change(self):
+        """Test bulk reorders bump updated_at"""
+        token = self.client.get(self.changes_url).data['token']
+        self.client.patch(
+            reverse('reorder_tasks'),
+            {'task_order': [{'id': self.old.id, 'order': 9}]},
+            format='json'
+        )
+        res = self.client.get(self.changes_url, {'since': token})
+        self.assertEqual([task['title'] for task in res.data['changed']], ['Old'])
+
+    def test_expired_token_resets(self):
+        """Test tokens older than the tombstone retention get a full reset"""
+        res = self.client.get(self.changes_url, {'since': '1'})
+        self.assertTrue(res.data['reset'])
+        self.assertEqual(len(res.data['changed']), 3)
+
+    def test_invalid_token(self):
+        """Test a garbled token is rejected"""
+        res = self.client.get(self.changes_url, {'since': 'yesterday'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_user_skips_tombstones(self):
+        """Test removing an account doesn't leave tombstones behind"""
+        self.user.delete()
+        self.assertFalse(TaskTombstone.objects.exists())
+
+
+class TaskBatchTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='batcher',
+            email='batcher@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.batch_url = reverse('task-batch')
+        self.existing = Task.objects.create(user=self.user, title='Existing', order=0)
+        self.doomed = Task.objects.create(user=self.user, title='Doomed', order=1)
+
+    def test_mixed_batch(self):
+        """Test creates, updates and deletes are applied together"""
+        payload = {'operations': [
+            {'op': 'create', 'data': {'title': 'First new'}},
+            {'op': 'update', 'id': self.existing.id, 'data': {'completed': True}},
+            {'op': 'delete', 'id': self.doomed.id},
+            {'op': 'create', 'data': {'title': 'Second new', 'description': 'Imported'}},
+        ]}
+        res = self.client.post(self.batch_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in res.data['results']],
+            ['created', 'updated', 'deleted', 'created']
+        )
+
+        self.existing.refresh_from_db()
+        self.assertTrue(self.existing.completed)
+        self.assertFalse(Task.objects.filter(id=self.doomed.id).exists())
+        titles = list(Task.objects.filter(user=self.user).order_by('order').values_list('title', flat=True))
+        self.assertEqual(titles, ['Existing', 'First new', 'Second new'])
+
+    def test_invalid_batch_writes_nothing(self):
+        """Test one bad operation rejects the whole batch with per-item errors"""
+        payload = {'operations': [
+            {'op': 'create', 'data': {'title': 'Valid'}},
+            {'op': 'create', 'data': {'title': '   '}},
+            {'op': 'delete', 'id': 999999},
+        ]}
+        res = self.client.post(self.batch_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [item['status'] for item in res.data['results']],
+            ['ok', 'error', 'error']
+        )
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 2)
+
+    def test_batch_cannot_touch_other_users_tasks(self):
+        """Test ids of other users' tasks are reported as not found"""
+        other = CustomUser.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        foreign = Task.objects.create(user=other, title='Foreign', order=0)
+        payload = {'operations': [{'op': 'delete', 'id': foreign.id}]}
+        res = self.client.post(self.batch_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Task.objects.filter(id=foreign.id).exists())
+
+    def test_batch_query_count_is_constant(self):
+        """Test the number of queries doesn't grow with the batch size"""
+        payload = {'operations': [{'op': 'create', 'data': {'title': f'Task {i}'}} for i in range(50)]}
+        with self.assertNumQueries(5):  # savepoint, next order, insert, version bump, release
+            res = self.client.post(self.batch_url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 52)
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='exporter',
+            email='exporter@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.export_url = reverse('task-export')
+        Task.objects.create(user=self.user, title='First', order=0, due_date=timezone.now())
+        Task.objects.create(user=self.user, title='Second, with comma', description='Line\nbreak', order=1)
+
+    def test_ndjson_export_matches_serializer(self):
+        """Test each NDJSON line is the task as the API serializes it"""
+        res = self.client.get(self.export_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        expected = TaskSerializer(Task.objects.filter(user=self.user).order_by('order'), many=True).data
+        self.assertEqual([json.loads(line) for line in lines], [dict(task) for task in expected])
+
+    def test_csv_export(self):
+        """Test CSV export has a header and quotes awkward values"""
+        res = self.client.get(self.export_url, {'as': 'csv'})
+        rows = list(csv.reader(StringIO(b''.join(res.streaming_content).decode())))
+        self.assertEqual(rows[0], ['id', 'title', 'description', 'completed', 'due_date', 'order'])
+        self.assertEqual(rows[2][1:3], ['Second, with comma', 'Line\nbreak'])
+
+    def test_unknown_format(self):
+        """Test an unsupported format is rejected"""
+        res = self.client.get(self.export_url, {'as': 'xml'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command_covers_all_users(self):
+        """Test the admin command exports every user's tasks with their user id"""
+        other = CustomUser.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        Task.objects.create(user=other, title='Theirs', order=0)
+        out = StringIO()
+        call_command('export_tasks', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['user_id'] for row in rows}, {self.user.id, other.id})
+
+
+class TaskImportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='importer',
+            email='importer@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.import_url = reverse('task-import')
+
+    def upload(self, name, content, **params):
+        url = self.import_url
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        if isinstance(content, str):
+            content = content.encode()
+        return self.client.post(url, {'file': SimpleUploadedFile(name, content)}, format='multipart')
+
+    def titles(self):
+        return list(Task.objects.filter(user=self.user).order_by('order').values_list('title', flat=True))
+
+    def test_ndjson_import_reports_bad_rows(self):
+        """Test valid rows are imported in file order and bad rows are reported"""
+        content = '\n'.join([
+            json.dumps({'title': 'One', 'completed': True}),
+            '{not json',
+            json.dumps({'title': '  '}),
+            '',
+            json.dumps({'title': 'Two', 'due_date': '2030-01-01T09:00:00Z'}),
+        ])
+        res = self.upload('tasks.ndjson', content)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['imported'], 2)
+        self.assertEqual(res.data['failed'], 2)
+        self.assertEqual([error['line'] for error in res.data['errors']], [2, 3])
+        self.assertEqual(self.titles(), ['One', 'Two'])
+
+    def test_undecodable_rows_are_reported(self):
+        """Test bytes that aren't UTF-8 and unparseable CSV fail their row, not the import"""
+        content = b'title,description\nOne,ok\nBad \xff,x\nBig,' + b'x' * 200000 + b'\nTwo,\xc3\xa9\n'
+        res = self.upload('tasks.csv', content)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['failed'], 2)
+        self.assertEqual([error['line'] for error in res.data['errors']], [3, 4])
+        self.assertEqual(self.titles(), ['One', 'Two'])
+
+        res = self.upload('tasks.ndjson', b'{"title": "Three"}\n{"title": "\xff"}\n')
+        self.assertEqual(res.data['imported'], 1)
+        self.assertEqual(res.data['errors'][0]['line'], 2)
+
+    def test_csv_round_trip_with_export(self):
+        """Test a CSV export can be imported back"""
+        Task.objects.create(user=self.user, title='Exported, once', description='Multi\nline', order=0)
+        exported = b''.join(self.client.get(reverse('task-export'), {'as': 'csv'}).streaming_content).decode()
+
+        res = self.upload('backup.csv', exported)
+        self.assertEqual(res.data['imported'], 1)
+        self.assertEqual(self.titles(), ['Exported, once', 'Exported, once'])
+        self.assertEqual(Task.objects.filter(description='Multi\nline').count(), 2)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_import_from_temporary_file(self):
+        """Test uploads spooled to disk are streamed too"""
+        content = '\n'.join(json.dumps({'title': f'Task {i}'}) for i in range(25))
+        res = self.upload('tasks.ndjson', content)
+        self.assertEqual(res.data['imported'], 25)
+
+    def test_import_is_chunked(self):
+        """Test each chunk is inserted with a single bulk insert"""
+        rows = ((i, {'title': f'Task {i}'}) for i in range(10))
+        # next order, then savepoint + insert + release per chunk of 4, then
+        # the new version counter (update, get, savepoint + insert + release)
+        with self.assertNumQueries(1 + 3 * 3 + 5):
+            summary = import_tasks(self.user.id, rows, chunk_size=4)
+        self.assertEqual(summary['imported'], 10)
+
+    def test_import_command(self):
+        """Test the management command imports a file for a user"""
+        out, err = StringIO(), StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.csv')
+            with open(path, 'w', newline='') as f:
+                f.write('title,completed\nFrom CLI,true\n,false\n')
+            call_command('import_tasks', path, user='importer@example.com', stdout=out, stderr=err)
+        self.assertIn('Imported 1 tasks, 1 rows failed', out.getvalue())
+        self.assertIn('line 3', err.getvalue())
+        self.assertTrue(Task.objects.get(title='From CLI').completed)
+
+
+class AsyncTaskViewTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='asyncer',
+            email='asyncer@example.com',
+            password='testpass123'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {'Authorization': 'Bearer ' + str(token)}
+        self.task = Task.objects.create(user=self.user, title='Soon', order=0, due_date=timezone.now() + timedelta(hours=1))
+        Task.objects.create(user=self.user, title='Later', order=1)
+
+    async def test_async_list_matches_sync_list(self):
+        """Test the async list returns the same payload as the DRF list"""
+        sync_res = await sync_to_async(APIClient().get)(TASKS_URL, headers=self.headers)
+        res = await self.async_client.get(reverse('async_task_list'), headers=self.headers)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), json.loads(sync_res.content))
+
+    async def test_async_detail(self):
+        """Test retrieving one task, and 404 for tasks of other users"""
+        res = await self.async_client.get(reverse('async_task_detail', args=[self.task.id]), headers=self.headers)
+        self.assertEqual(res.json()['title'], 'Soon')
+        res = await self.async_client.get(reverse('async_task_detail', args=[999999]), headers=self.headers)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_upcoming(self):
+        """Test upcoming only returns tasks due within a day"""
+        res = await self.async_client.get(reverse('async_upcoming_tasks'), headers=self.headers)
+        self.assertEqual([task['title'] for task in res.json()], ['Soon'])
+
+    async def test_async_current_user(self):
+        """Test the current user is loaded from the token's user id"""
+        res = await self.async_client.get(reverse('async_current_user'), headers=self.headers)
+        self.assertEqual(res.json(), {'username': 'asyncer', 'email': 'asyncer@example.com'})
+
+    async def test_async_views_require_token(self):
+        """Test missing or bad tokens are rejected"""
+        res = await self.async_client.get(reverse('async_task_list'))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = await self.async_client.get(reverse('async_task_list'), headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class FastTaskSerializationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='fast',
+            email='fast@example.com',
+            password='testpass123'
+        )
+        due = timezone.now().replace(microsecond=123456)
+        Task.objects.create(user=self.user, title='Plain', order=0)
+        Task.objects.create(user=self.user, title='Due', description='Details', due_date=due, order=1)
+        Task.objects.create(user=self.user, title='Done', completed=True, due_date=due.replace(microsecond=0), order=2)
+
+    def assert_matches_serializer(self):
+        tasks = Task.objects.filter(user=self.user).order_by('order')
+        expected = [dict(task) for task in TaskSerializer(tasks, many=True).data]
+        self.assertEqual(serialize_task_values(task_values(tasks)), expected)
+
+    def test_fast_path_matches_serializer(self):
+        """Test the fast path produces exactly TaskSerializer's output"""
+        self.assert_matches_serializer()
+
+    def test_fast_path_matches_serializer_in_other_time_zone(self):
+        """Test due dates are converted to the active time zone the same way"""
+        with timezone.override('Asia/Kolkata'):
+            self.assert_matches_serializer()
+
+    def test_fast_path_covers_every_serialized_field(self):
+        """Test a field added to TaskSerializer shows up in the fast path too"""
+        row = serialize_task_values(task_values(Task.objects.filter(user=self.user)))[0]
+        self.assertEqual(list(row), list(TaskSerializer.Meta.fields))
+
+    def test_list_endpoint_uses_fast_path(self):
+        """Test the task list response equals TaskSerializer output"""
+        client = create_authenticated_client(self.user)
+        res = client.get(TASKS_URL)
+        tasks = Task.objects.filter(user=self.user).order_by('order')
+        self.assertEqual(json.loads(res.content), json.loads(json.dumps(TaskSerializer(tasks, many=True).data)))
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='sparse',
+            email='sparse@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        for i in range(3):
+            Task.objects.create(
+                user=self.user, title=f'Task {i}', description='x' * 1000, order=i,
+                due_date=timezone.now() + timedelta(hours=i + 1)
+            )
+
+    def test_fields_narrow_output_and_columns(self):
+        """Test ?fields= returns only those fields and only selects their columns"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TASKS_URL, {'fields': 'title,id'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([list(task) for task in res.data], [['id', 'title']] * 3)
+        self.assertFalse(any('"description"' in query['sql'] for query in queries.captured_queries))
+
+    def test_exclude(self):
+        """Test ?exclude= drops fields and matches the narrowed serializer"""
+        res = self.client.get(TASKS_URL, {'exclude': 'description'})
+        tasks = Task.objects.filter(user=self.user).order_by('order')
+        fields = ['id', 'title', 'completed', 'due_date', 'order']
+        expected = TaskSerializer(tasks, many=True, fields=fields).data
+        self.assertEqual(json.loads(res.content), json.loads(json.dumps(expected)))
+
+    def test_fields_work_with_cursor_pagination(self):
+        """Test next links still work when id and order aren't returned"""
+        res = self.client.get(TASKS_URL, {'fields': 'title', 'limit': 2})
+        titles = [task['title'] for task in res.data['results']]
+        res = self.client.get(res.data['next'])
+        titles += [task['title'] for task in res.data['results']]
+        self.assertEqual(titles, ['Task 0', 'Task 1', 'Task 2'])
+        self.assertEqual(list(res.data['results'][0]), ['title'])
+
+    def test_retrieve_and_upcoming(self):
+        """Test the detail and upcoming endpoints accept a fieldset too"""
+        task = Task.objects.filter(user=self.user).first()
+        res = self.client.get(reverse('task-detail', args=[task.id]), {'fields': 'id,completed'})
+        self.assertEqual(res.data, {'id': task.id, 'completed': False})
+        res = self.client.get(reverse('upcoming_tasks'), {'exclude': 'description,order'})
+        self.assertEqual(list(res.data[0]), ['id', 'title', 'completed', 'due_date'])
+
+    def test_invalid_fieldsets(self):
+        """Test unknown fields, both parameters or an empty result are rejected"""
+        for params in ({'fields': 'title,secret'}, {'fields': 'title', 'exclude': 'order'}, {'fields': ','}):
+            res = self.client.get(TASKS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(reverse('upcoming_tasks'), {'exclude': 'user'})
+        self.assertIn('Unknown fields: user', res.data['error'])
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='mailer',
+            email='mailer@example.com',
+            password='testpass123'
+        )
+
+    def test_verification_email_is_only_queued(self):
+        """Test the request path stores the email instead of sending it"""
+        send_verification_email(self.user, 'token123')
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, ['mailer@example.com'])
+        self.assertIn('token123', email.body)
+
+    def test_worker_sends_batch_over_one_connection(self):
+        """Test queued emails go out together and are marked sent"""
+        for i in range(3):
+            enqueue_email(f'Subject {i}', 'Body', ['someone@example.com'])
+        with mock.patch('tasks.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(deliver_batch(), (3, 0))
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.SENT).count(), 3)
+        self.assertEqual(deliver_batch(), (0, 0))
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        """Test failed sends are retried later and eventually marked failed"""
+        email = enqueue_email('Subject', 'Body', ['someone@example.com'])
+        backend = 'django.core.mail.backends.locmem.EmailBackend.send_messages'
+        with mock.patch(backend, side_effect=OSError('Connection refused')):
+            self.assertEqual(deliver_batch(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutboxEmail.PENDING)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertEqual(deliver_batch(), (0, 0))  # not due yet
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_batch(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.FAILED)
+        self.assertEqual(email.last_error, 'Connection refused')
+
+    def test_send_outbox_command(self):
+        """Test the worker command drains the outbox with --once"""
+        enqueue_email('Subject', 'Body', ['someone@example.com'])
+        out = StringIO()
+        call_command('send_outbox', once=True, stdout=out)
+        self.assertIn('Sent 1 emails', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(REMINDER_LEAD_MINUTES=60, REMINDER_GRACE_MINUTES=60)
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='reminded',
+            email='reminded@example.com',
+            password='testpass123'
+        )
+        self.now = timezone.now()
+        self.soon = Task.objects.create(user=self.user, title='Soon', order=0, due_date=self.now + timedelta(minutes=30))
+        self.later = Task.objects.create(user=self.user, title='Later', order=1, due_date=self.now + timedelta(hours=5))
+        Task.objects.create(user=self.user, title='Done', order=2, completed=True, due_date=self.now + timedelta(minutes=10))
+        Task.objects.create(user=self.user, title='Long gone', order=3, due_date=self.now - timedelta(days=1))
+
+    def test_sends_reminders_inside_lead_time(self):
+        """Test only open tasks due within the lead time are reminded"""
+        sent, wait = ReminderScheduler().run_once(self.now)
+        self.assertEqual(sent, 1)
+        self.assertEqual(list(TaskReminder.objects.values_list('task__title', flat=True)), ['Soon'])
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, ['reminded@example.com'])
+        self.assertIn('Soon', email.subject)
+
+    def test_restart_does_not_duplicate(self):
+        """Test a fresh scheduler skips reminders that were already sent"""
+        ReminderScheduler().run_once(self.now)
+        sent, _ = ReminderScheduler().run_once(self.now)
+        self.assertEqual(sent, 0)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    def test_heap_fires_when_deadline_approaches(self):
+        """Test a queued reminder fires once its time comes"""
+        scheduler = ReminderScheduler(horizon=timedelta(hours=6))
+        scheduler.run_once(self.now)
+        sent, _ = scheduler.run_once(self.later.due_date - timedelta(minutes=59))
+        self.assertEqual(sent, 1)
+        self.assertEqual(TaskReminder.objects.count(), 2)
+
+    def test_redispatch_after_a_lost_reminder_row_sends_once(self):
+        """Test a reminder whose row was lost (shard rolled back after the outbox committed) isn't emailed twice"""
+        ReminderScheduler().run_once(self.now)
+        TaskReminder.objects.all().delete()
+        ReminderScheduler().run_once(self.now)
+        self.assertEqual(TaskReminder.objects.count(), 1)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    def test_users_without_email_dont_keep_the_scheduler_busy(self):
+        """Test a reminder that can't be emailed is recorded once and doesn't force a zero wait"""
+        CustomUser.objects.filter(pk=self.user.pk).update(email='')
+        scheduler = ReminderScheduler()
+        sent, wait = scheduler.run_once(self.now)
+        self.assertEqual(sent, 0)
+        self.assertGreater(wait, 0)
+        self.assertEqual(TaskReminder.objects.get().task, self.soon)
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertEqual(list(pending_reminders(self.now, timedelta(0), 10)), [])
+
+    def test_missed_reminder_is_caught_up(self):
+        """Test a deadline that passed while the scheduler was down is still reminded"""
+        sent, _ = ReminderScheduler().run_once(self.now + timedelta(minutes=45))
+        self.assertEqual(sent, 1)
+
+    def test_rescheduled_task_is_reminded_again(self):
+        """Test moving the due date earns a new reminder"""
+        ReminderScheduler().run_once(self.now)
+        self.soon.due_date = self.now + timedelta(minutes=40)
+        self.soon.save()
+        sent, _ = ReminderScheduler().run_once(self.now)
+        self.assertEqual(sent, 1)
+
+    def test_completed_before_dispatch_is_skipped(self):
+        """Test a task completed after being queued isn't reminded"""
+        scheduler = ReminderScheduler(horizon=timedelta(hours=6))
+        scheduler.run_once(self.now)
+        Task.objects.filter(id=self.later.id).update(completed=True)
+        sent, _ = scheduler.run_once(self.later.due_date - timedelta(minutes=30))
+        self.assertEqual(sent, 0)
+
+
+class ApiBenchmarkTests(TestCase):
+    def test_report_covers_every_endpoint(self):
+        """Test the API benchmark reports latency and query counts for each scenario"""
+        command = BenchmarkApiCommand()
+        report = command.run({
+            'users': 2, 'tasks_per_user': 10, 'requests': 3, 'concurrency': 1,
+            'endpoints': list(command.scenarios()), 'seed': 0,
+        })
+
+        self.assertEqual(set(report['endpoints']), set(command.scenarios()))
+        for result in report['endpoints'].values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+        self.assertEqual(report['endpoints']['login']['queries']['max'], 1)
+        json.dumps(report)
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, METRICS_SERVER_TIMING=True, METRICS_TOKEN='scrape-me')
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics_registry.clear()
+        self.user = CustomUser.objects.create_user(
+            username='measured',
+            email='measured@example.com',
+            password='testpass123'
+        )
+        Task.objects.create(user=self.user, title='Measured', order=0)
+        self.client = create_authenticated_client(self.user)
+
+    def scrape(self):
+        res = APIClient().get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.content.decode()
+
+    def test_sampled_request_is_recorded(self):
+        """Test a request's latency, queries and spans reach the histograms and Server-Timing"""
+        res = self.client.get(TASKS_URL)
+        timing = res['Server-Timing']
+        for name in ('db;', 'auth;', 'serialize;', 'total;'):
+            self.assertIn(name, timing)
+
+        body = self.scrape()
+        self.assertIn('task_manager_db_queries_count{method="GET",view="task-list"} 1', body)
+        self.assertIn('task_manager_request_duration_seconds_bucket{method="GET",status="200",view="task-list",le="+Inf"} 1', body)
+        self.assertIn('task_manager_span_duration_seconds_count{method="GET",span="auth",view="task-list"} 1', body)
+        self.assertIn('task_manager_response_size_bytes_count{method="GET",view="task-list"} 1', body)
+
+    async def test_async_views_are_recorded(self):
+        """Test the middleware also measures native async views"""
+        token = RefreshToken.for_user(self.user).access_token
+        res = await self.async_client.get(reverse('async_task_list'), headers={'Authorization': f'Bearer {token}'})
+        self.assertIn('serialize;', res['Server-Timing'])
+        self.assertNotIn('desc="0 queries"', res['Server-Timing'])
+        body = await sync_to_async(self.scrape)()
+        self.assertIn('task_manager_db_queries_count{method="GET",view="async_task_list"} 1', body)
+        self.assertNotIn('task_manager_db_queries_sum{method="GET",view="async_task_list"} 0', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_recorded(self):
+        """Test requests outside the sample skip instrumentation"""
+        res = self.client.get(TASKS_URL)
+        self.assertNotIn('Server-Timing', res)
+        self.assertNotIn('task-list', self.scrape())
+
+    def test_scrape_requires_token(self):
+        """Test the metrics endpoint rejects scrapers without the token"""
+        res = self.client.get(reverse('metrics'))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(
+    AUTH_THROTTLE_IP_BURST=5, AUTH_THROTTLE_IP_PER_MINUTE=60,
+    AUTH_THROTTLE_EMAIL_BURST=2, AUTH_THROTTLE_EMAIL_PER_MINUTE=1,
+)
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bucket_store.clear()
+        # Don't leave drained buckets behind for other tests' logins
+        self.addCleanup(cache.clear)
+        self.addCleanup(bucket_store.clear)
+        # Freeze the clock so buckets don't refill while a test runs
+        clock = mock.patch('tasks.throttling.time.time', return_value=1000.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.client = APIClient()
+        self.login_url = reverse('login')
+
+    def login(self, email='victim@example.com'):
+        return self.client.post(self.login_url, {'email': email, 'password': 'guess'}, format='json')
+
+    def test_email_bucket_rejects_before_hashing(self):
+        """Test excess logins for one email get 429 without reaching authenticate()"""
+        self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+        with mock.patch('tasks.views.authenticate') as authenticate:
+            res = self.login()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '60')
+        authenticate.assert_not_called()
+
+    def test_ip_bucket_covers_every_auth_endpoint(self):
+        """Test one IP shares a bucket across login, register and token requests"""
+        for i in range(5):
+            self.login(f'user{i}@example.com')
+        res = self.client.post(REGISTER_URL, {'username': 'x', 'email': 'new@example.com', 'password': 'longpassword'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        res = self.client.post(reverse('token_obtain_pair'), {'email': 'other@example.com', 'password': 'guess'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(CustomUser.objects.exists())
+
+    def test_ip_bucket_ignores_forged_forwarded_for(self):
+        """Test clients can't get a fresh bucket by making up X-Forwarded-For entries"""
+        for i in range(5):
+            # The proxy appends the address it saw to whatever the client sent
+            self.client.post(self.login_url, {'email': f'user{i}@example.com', 'password': 'guess'},
+                             format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7')
+        res = self.client.post(self.login_url, {'email': 'last@example.com', 'password': 'guess'},
+                               format='json', HTTP_X_FORWARDED_FOR='10.0.0.99, 203.0.113.7')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_concurrent_spends_stay_within_capacity(self):
+        """Test parallel requests racing on an empty bucket can't take more than its capacity"""
+        get = LocMemCache.get
+
+        def slow_get(*args, **kwargs):
+            # Widen the window between reading the bucket and writing it back
+            value = get(*args, **kwargs)
+            time.sleep(0.002)
+            return value
+
+        start = threading.Barrier(20)
+        results = []
+
+        def attempt():
+            start.wait()
+            results.append(bucket_store.take('throttle:test:race', 5, 1 / 60)[0])
+
+        # Patched on the class: each thread gets its own cache object
+        with mock.patch.object(LocMemCache, 'get', autospec=True, side_effect=slow_get):
+            threads = [threading.Thread(target=attempt) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(True), 5)
+
+    def test_bucket_refills(self):
+        """Test tokens come back at the configured rate"""
+        with mock.patch('tasks.throttling.time.time', return_value=1000.0):
+            self.login()
+            self.login()
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with mock.patch('tasks.throttling.time.time', return_value=1061.0):
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_falls_back_to_memory_when_cache_fails(self):
+        """Test throttling keeps working if the cache backend is down"""
+        with mock.patch('tasks.throttling.cache.get', side_effect=ConnectionError):
+            self.login()
+            self.login()
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class StructuredLoggingTests(TestCase):
+    def test_registration_log_redacts_secrets(self):
+        """Test registration events carry the payload with the password and tokens masked"""
+        with self.assertLogs('tasks.views', level='DEBUG') as logs:
+            self.client.post(REGISTER_URL, {
+                'username': 'logged', 'email': 'logged@example.com', 'password': 'supersecret123',
+            }, format='json')
+
+        output = '\n'.join(StructuredFormatter().format(record) for record in logs.records)
+        self.assertNotIn('supersecret123', output)
+        entries = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(entries[0]['event'], 'registration.received')
+        self.assertEqual(entries[0]['data']['password'], '[REDACTED]')
+        response = next(entry for entry in entries if entry['event'] == 'registration.response')
+        self.assertEqual(response['response']['access'], '[REDACTED]')
+
+    def test_sampling_only_drops_listed_levels(self):
+        """Test sampled levels are dropped at rate 0 while warnings always pass"""
+        sampler = SamplingFilter({'INFO': 0})
+        info = logging.LogRecord('tasks', logging.INFO, __file__, 1, 'event', None, None)
+        warning = logging.LogRecord('tasks', logging.WARNING, __file__, 1, 'event', None, None)
+        self.assertFalse(sampler.filter(info))
+        self.assertTrue(sampler.filter(warning))
+
+    def test_queued_handler_writes_from_listener(self):
+        """Test records are formatted and written by the listener thread"""
+        stream = StringIO()
+        handler = queued_handler()
+        handler.listener.handlers[0].setStream(stream)
+        logger = logging.getLogger('tasks.tests.queued')
+        logger.addHandler(handler)
+        try:
+            logger.warning('queued.event', extra={'fields': {'token': 'abc', 'id': 1}})
+        finally:
+            logger.removeHandler(handler)
+            handler.listener.stop()
+        self.assertEqual(json.loads(stream.getvalue())['token'], '[REDACTED]')
+
+
+class TaskStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='counted',
+            email='counted@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.moment = timezone.make_aware(datetime(2026, 3, 10, 12, 0))
+        Task.objects.create(user=self.user, title='Overdue today', order=0, due_date=self.moment - timedelta(hours=2))
+        Task.objects.create(user=self.user, title='Later today', order=1, due_date=self.moment + timedelta(hours=2))
+        Task.objects.create(user=self.user, title='Overdue', order=2, due_date=self.moment - timedelta(days=3))
+        Task.objects.create(user=self.user, title='Someday', order=3)
+        for days_ago in (0, 0, 2):
+            task = Task.objects.create(user=self.user, title='Done', order=4, completed=True)
+            Task.objects.filter(id=task.id).update(completed_at=self.moment - timedelta(days=days_ago))
+
+    def test_counts_in_one_query(self):
+        """Test every dashboard count comes from a single aggregate query"""
+        with self.assertNumQueries(1):
+            counts = task_counts(self.user.id, self.moment)
+        self.assertEqual(counts, {'total': 7, 'completed': 3, 'overdue': 2, 'due_today': 2})
+
+    def test_completions_per_day(self):
+        """Test completions are bucketed per day, oldest first, with empty days as 0"""
+        summary = task_summary(self.user.id, days=3, moment=self.moment)
+        self.assertEqual(summary['open'], 4)
+        self.assertEqual(summary['completed_per_day'], [
+            {'date': '2026-03-08', 'count': 1},
+            {'date': '2026-03-09', 'count': 0},
+            {'date': '2026-03-10', 'count': 2},
+        ])
+
+    def test_completed_at_follows_completed(self):
+        """Test completing a task stamps completed_at and reopening clears it"""
+        task = Task.objects.get(title='Someday')
+        self.client.patch(f'{TASKS_URL}{task.id}/', {'completed': True}, format='json')
+        task.refresh_from_db()
+        self.assertIsNotNone(task.completed_at)
+        self.client.patch(f'{TASKS_URL}{task.id}/', {'completed': False}, format='json')
+        task.refresh_from_db()
+        self.assertIsNone(task.completed_at)
+
+    def test_stats_endpoint_tracks_writes(self):
+        """Test the endpoint serves cached counts until a task changes"""
+        url = reverse('task-stats')
+        res = self.client.get(url, {'days': 7})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['total'], 7)
+        self.assertEqual(len(res.data['completed_per_day']), 7)
+
+        self.client.post(TASKS_URL, {'title': 'New'}, format='json')
+        self.assertEqual(self.client.get(url, {'days': 7}).data['total'], 8)
+
+    def test_stats_rejects_bad_range(self):
+        """Test days outside 1..90 is a 400"""
+        res = self.client.get(reverse('task-stats'), {'days': 1000})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='planner',
+            email='planner@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.url = reverse('task-calendar')
+        utc = timezone.get_fixed_timezone(0)
+        self.late = Task.objects.create(user=self.user, title='Late night', order=0, completed=True,
+                                        due_date=datetime(2026, 3, 10, 23, 30, tzinfo=utc))
+        Task.objects.create(user=self.user, title='Morning', order=1, due_date=datetime(2026, 3, 10, 8, 0, tzinfo=utc))
+        Task.objects.create(user=self.user, title='Next month', order=2, due_date=datetime(2026, 4, 2, 8, 0, tzinfo=utc))
+        Task.objects.create(user=self.user, title='Undated', order=3)
+
+    def titles_by_day(self, res):
+        return {day['date']: [task['title'] for task in day['tasks']] for day in res.data['days'] if day['tasks']}
+
+    def test_days_are_bucketed_in_requested_zone(self):
+        """Test tasks land on their local day and due dates are rendered in that zone"""
+        res = self.client.get(self.url, {'start': '2026-03-01', 'end': '2026-03-31'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['days']), 31)
+        self.assertEqual(self.titles_by_day(res), {'2026-03-10': ['Morning', 'Late night']})
+
+        res = self.client.get(self.url, {'start': '2026-03-01', 'end': '2026-03-31', 'tz': 'Europe/Berlin'})
+        self.assertEqual(res.data['time_zone'], 'Europe/Berlin')
+        self.assertEqual(self.titles_by_day(res), {'2026-03-10': ['Morning'], '2026-03-11': ['Late night']})
+        late = res.data['days'][10]['tasks'][0]
+        self.assertEqual(late['due_date'], '2026-03-11T00:30:00+01:00')
+
+    def test_only_range_rows_are_read(self):
+        """Test the query is limited to the range by due_date rather than filtered afterwards"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'start': '2026-04-01', 'end': '2026-04-30'})
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('"due_date" >=', sql)
+        self.assertIn('"due_date" <', sql)
+
+    def test_rejects_bad_parameters(self):
+        """Test invalid dates, ranges and zones are 400s"""
+        for params in (
+            {'start': '2026-03-01'},
+            {'start': '2026-03-10', 'end': '2026-03-01'},
+            {'start': '2026-01-01', 'end': '2026-12-31'},
+            {'start': '2026-03-01', 'end': '2026-03-31', 'tz': 'Mars/Olympus'},
+        ):
+            res = self.client.get(self.url, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class TaskArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='archivist',
+            email='archivist@example.com',
+            password='testpass123'
+        )
+        self.client = create_authenticated_client(self.user)
+        self.old = []
+        for i in range(3):
+            task = Task.objects.create(user=self.user, title=f'Old report {i}', order=i, completed=True)
+            self.old.append(task)
+        Task.objects.filter(id__in=[task.id for task in self.old]).update(
+            completed_at=timezone.now() - timedelta(days=200)
+        )
+        self.recent = Task.objects.create(user=self.user, title='Recent', order=10, completed=True)
+        self.open = Task.objects.create(user=self.user, title='Open', order=11)
+
+    def test_archives_old_completed_tasks_in_batches(self):
+        """Test only tasks completed before the cutoff move, however small the batches"""
+        archived = archive_completed_tasks(batch_size=2)
+        self.assertEqual(archived, 3)
+        self.assertEqual(
+            set(ArchivedTask.objects.values_list('id', flat=True)), {task.id for task in self.old}
+        )
+        self.assertEqual(set(Task.objects.values_list('id', flat=True)), {self.recent.id, self.open.id})
+        # Sync clients are told the archived tasks left the active list
+        self.assertEqual(TaskTombstone.objects.filter(user=self.user).count(), 3)
+
+    def test_archive_is_queried_on_demand(self):
+        """Test ?archived=true lists (and searches) the archive instead of active tasks"""
+        call_command('archive_tasks', pause=0, stdout=StringIO())
+        res = self.client.get(TASKS_URL)
+        self.assertEqual([task['title'] for task in res.data], ['Recent', 'Open'])
+
+        res = self.client.get(TASKS_URL, {'archived': 'true'})
+        self.assertEqual([task['title'] for task in res.data], ['Old report 0', 'Old report 1', 'Old report 2'])
+        res = self.client.get(TASKS_URL, {'archived': 'true', 'search': 'report 1'})
+        self.assertEqual([task['title'] for task in res.data], ['Old report 1'])
+
+    def test_restore_brings_tasks_back_reopened(self):
+        """Test restoring keeps the id, reopens the task and appends it to the list"""
+        archive_completed_tasks()
+        res = self.client.post(reverse('task-restore'), {'ids': [self.old[1].id]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['restored'], [self.old[1].id])
+
+        task = Task.objects.get(id=self.old[1].id)
+        self.assertFalse(task.completed)
+        self.assertIsNone(task.completed_at)
+        self.assertGreater(task.order, self.open.order)
+        self.assertFalse(ArchivedTask.objects.filter(id=task.id).exists())
+        self.assertEqual(self.client.get(TASKS_URL).data[-1]['id'], task.id)
+
+    def test_restored_tasks_sync_as_changed_not_deleted(self):
+        """Test a sync token from before archiving sees a restored task only as changed"""
+        token = self.client.get(reverse('task-changes')).data['token']
+        archive_completed_tasks()
+        self.client.post(reverse('task-restore'), {'ids': [self.old[1].id]}, format='json')
+
+        res = self.client.get(reverse('task-changes'), {'since': token})
+        self.assertIn(self.old[1].id, [task['id'] for task in res.data['changed']])
+        self.assertNotIn(self.old[1].id, res.data['deleted'])
+        self.assertIn(self.old[0].id, res.data['deleted'])
+
+    def test_restore_only_own_archived_tasks(self):
+        """Test ids that aren't in the user's archive restore nothing"""
+        archive_completed_tasks()
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        res = create_authenticated_client(other).post(
+            reverse('task-restore'), {'ids': [self.old[0].id]}, format='json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(ArchivedTask.objects.filter(id=self.old[0].id).exists())
+
+
+# choose_replica() hands out the primary in place of replica_0; what's
+# checked is where reads are sent. TransactionTestCase, since reads inside
+# a transaction (as TestCase wraps every test in) stay on the primary.
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='testpass123'
+        )
+        Task.objects.create(user=self.user, title='Existing', order=0)
+        self.client = create_authenticated_client(self.user)
+        patcher = mock.patch.object(PrimaryReplicaRouter, 'choose_replica', return_value='default')
+        self.choose_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_safe_requests_read_from_replica(self):
+        """Test GET requests send their reads to a replica"""
+        res = self.client.get(TASKS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.choose_replica.assert_called_once()
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        """Test a user's reads stay on the primary for a while after they write"""
+        self.client.post(TASKS_URL, {'title': 'Fresh'}, format='json')
+        res = self.client.get(TASKS_URL)
+        self.assertEqual([task['title'] for task in res.data], ['Existing', 'Fresh'])
+        self.choose_replica.assert_not_called()
+
+        # Other users are unaffected
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        create_authenticated_client(other).get(TASKS_URL)
+        self.choose_replica.assert_called_once()
+
+    def test_sticky_window_expires(self):
+        """Test reads go back to the replica once the pin has expired"""
+        self.client.post(TASKS_URL, {'title': 'Fresh'}, format='json')
+        cache.clear()
+        self.client.get(TASKS_URL)
+        self.choose_replica.assert_called_once()
+
+    def test_users_are_read_from_primary(self):
+        """Test auth lookups, made before the user is known, skip the replica"""
+        user_cache.clear()
+        res = self.client.get(reverse('current-user'))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.choose_replica.assert_not_called()
+
+    def test_primary_outside_requests(self):
+        """Test code running outside a request, like management commands, reads the primary"""
+        router = PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(Task))
+        self.assertTrue(router.allow_migrate('default', 'tasks'))
+        self.assertFalse(router.allow_migrate('replica_0', 'tasks'))
+
+
+@override_settings(TASK_SHARDS=['default', 'shard_1'])
+class TaskShardingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Even pk -> default, odd pk -> shard_1
+        self.user = CustomUser.objects.create_user(username='sharded', email='sharded@example.com', password='testpass123')
+        self.alias = settings.TASK_SHARDS[self.user.pk % 2]
+
+    def test_new_users_are_spread_over_shards(self):
+        """Test new accounts get a shard, and the lookup is cached"""
+        self.assertEqual(self.user.shard.alias, self.alias)
+        cache.clear()
+        self.assertEqual(shard_for_user(self.user.pk), self.alias)
+        with self.assertNumQueries(0):
+            self.assertEqual(shard_for_user(self.user.pk), self.alias)
+
+    def test_cached_assignment_expires(self):
+        """Test an assignment changed behind the cache's back is seen once the entry expires"""
+        other = 'shard_1' if self.alias == 'default' else 'default'
+        cache.clear()
+        with override_settings(TASK_SHARD_CACHE_TIMEOUT=0):
+            self.assertEqual(shard_for_user(self.user.pk), self.alias)
+            CustomUserShard.objects.filter(user=self.user).update(alias=other)
+            self.assertEqual(shard_for_user(self.user.pk), other)
+
+    def test_users_without_a_shard_stay_on_default(self):
+        """Test accounts from before sharding keep using default"""
+        self.user.shard.delete()
+        cache.clear()
+        self.assertEqual(shard_for_user(self.user.pk), 'default')
+
+    def test_for_user_reads_from_the_users_shard(self):
+        """Test Task.objects.for_user() targets the user's shard"""
+        self.assertEqual(Task.objects.for_user(self.user).db, self.alias)
+        with override_settings(TASK_SHARDS=['default']), self.assertNumQueries(0):
+            Task.objects.for_user(self.user.pk)
+
+    def test_router(self):
+        """Test the router follows instances, use_shard() and leaves the rest alone"""
+        router = TaskShardRouter()
+        task = Task(user_id=self.user.pk, title='New')
+        self.assertEqual(router.db_for_write(Task, instance=task), self.alias)
+        task._state.db = 'shard_1'
+        self.assertEqual(router.db_for_read(CustomUser, instance=task), 'default')
+        self.assertEqual(router.db_for_read(Task, instance=self.user), self.alias)
+        self.assertIsNone(router.db_for_read(Task))
+        self.assertIsNone(router.db_for_read(OutboxEmail))
+        with use_shard('shard_1'):
+            self.assertEqual(router.db_for_write(TaskTombstone), 'shard_1')
+        with override_settings(TASK_SHARDS=['default']):
+            self.assertIsNone(router.db_for_write(Task, instance=task))
+
+    def test_id_ranges_do_not_overlap(self):
+        """Test every shard allocates ids from its own range"""
+        self.assertEqual(shard_id_range('default')[1], shard_id_range('shard_1')[0])
+
+
+# shard_1 is the SQLite database backend/test_settings.py adds for the tests
+@override_settings(TASK_SHARDS=['default', 'shard_1'], REMINDER_LEAD_MINUTES=60, REMINDER_GRACE_MINUTES=60)
+class ShardMoveTests(TransactionTestCase):
+    databases = {'default', 'shard_1'}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Migrations ran before TASK_SHARDS listed shard_1
+        reset_shard_sequences('shard_1')
+        self.user = CustomUser.objects.create_user(username='mover', email='mover@example.com', password='testpass123')
+        set_user_shard(self.user.pk, 'default')
+        self.client = create_authenticated_client(self.user)
+        for title in ('First', 'Second'):
+            self.client.post(TASKS_URL, {'title': title}, format='json')
+
+    def test_move_keeps_the_users_tasks(self):
+        """Test moving a user to another shard carries their tasks over, ids included"""
+        before = self.client.get(TASKS_URL).data
+
+        moved = move_user(self.user.pk, 'shard_1')
+        self.assertEqual(moved['task'], 2)
+        self.assertFalse(Task.objects.using('default').filter(user=self.user).exists())
+        self.assertEqual(self.client.get(TASKS_URL).data, before)
+        self.assertEqual({row['shard']: row['tasks'] for row in shard_report()}, {'default': 0, 'shard_1': 2})
+
+        # New tasks get ids from shard_1's own range
+        res = self.client.post(TASKS_URL, {'title': 'Third'}, format='json')
+        low, high = shard_id_range('shard_1')
+        self.assertTrue(low < res.data['id'] <= high)
+        self.assertEqual(Task.objects.using('shard_1').filter(user=self.user).count(), 3)
+
+    def test_failed_move_leaves_the_user_where_they_were(self):
+        """Test a copy that fails switches the user back and leaves nothing on the target"""
+        from .sharding import _copy_rows
+
+        def copy_tasks_only(model, queryset, target):
+            if model is not Task:
+                raise IntegrityError('boom')
+            return _copy_rows(model, queryset, target)
+
+        before = self.client.get(TASKS_URL).data
+        with mock.patch('tasks.sharding._copy_rows', side_effect=copy_tasks_only):
+            with self.assertRaises(IntegrityError):
+                move_user(self.user.pk, 'shard_1')
+
+        self.assertEqual(shard_for_user(self.user.pk), 'default')
+        self.assertEqual(self.user.shard.alias, 'default')
+        self.assertFalse(Task.objects.using('shard_1').exists())
+        self.assertEqual(self.client.get(TASKS_URL).data, before)
+
+    def test_deleting_a_user_clears_their_shard(self):
+        """Test a user's rows on another shard go when the account is deleted"""
+        move_user(self.user.pk, 'shard_1')
+        self.user.delete()
+        self.assertFalse(Task.objects.using('shard_1').exists())
+        self.assertFalse(TaskListVersion.objects.using('shard_1').exists())
+
+    def test_search_on_a_shard(self):
+        """Test search runs against the shard that holds the user's tasks"""
+        move_user(self.user.pk, 'shard_1')
+        res = self.client.get(TASKS_URL, {'search': 'second'})
+        self.assertEqual([task['title'] for task in res.data], ['Second'])
+
+    def test_archive_and_reminders_cover_every_shard(self):
+        """Test the archive job and the reminder scheduler visit each shard"""
+        other = CustomUser.objects.create_user(username='stayer', email='stayer@example.com', password='testpass123')
+        set_user_shard(other.pk, 'default')
+        move_user(self.user.pk, 'shard_1')
+        moment = timezone.now()
+        for user in (self.user, other):
+            with user_shard(user.pk):
+                Task.objects.create(user=user, title='Done', order=10, completed=True)
+                Task.objects.create(user=user, title='Due', order=11, due_date=moment + timedelta(minutes=30))
+        for alias in settings.TASK_SHARDS:
+            Task.objects.using(alias).filter(title='Done').update(completed_at=moment - timedelta(days=200))
+
+        self.assertEqual(archive_completed_tasks(), 2)
+        self.assertEqual(ArchivedTask.objects.using('shard_1').get().user_id, self.user.pk)
+
+        sent, _ = ReminderScheduler().run_once(moment)
+        self.assertEqual(sent, 2)
+        self.assertEqual(TaskReminder.objects.using('shard_1').count(), 1)
+        self.assertEqual(
+            sorted(email.recipients[0] for email in OutboxEmail.objects.all()),
+            ['mover@example.com', 'stayer@example.com']
+        )
+
+
+class RendererTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='render', email='render@example.com', password='testpass123')
+        self.client = create_authenticated_client(self.user)
+        Task.objects.bulk_create([
+            Task(user=self.user, title=f'Täsk {i} \u2028', description='Lorem ipsum ' * 20, order=i)
+            for i in range(50)
+        ])
+
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_orjson_renders_the_same_bytes(self):
+        """Test ORJSONRenderer output is identical to DRF's JSONRenderer"""
+        data = {
+            'tasks': serialize_task_values(task_values(Task.objects.filter(user=self.user))),
+            'when': timezone.now(),
+            'amount': Decimal('1.5'),
+            'label': gettext_lazy('Lazy'),
+            1: None,
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4')
+        )
+
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_orjson_parser(self):
+        """Test ORJSONParser parses bodies and rejects invalid JSON"""
+        self.assertEqual(ORJSONParser().parse(BytesIO(b'{"a": [1]}')), {'a': [1]})
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(BytesIO(body))
+        res = self.client.post(TASKS_URL, '{"title": "Fast"}', content_type='application/json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_messagepack_negotiation(self):
+        """Test MessagePack is served and accepted when the client asks for it"""
+        res = self.client.get(TASKS_URL, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content), json.loads(self.client.get(TASKS_URL).content))
+        res = self.client.post(
+            TASKS_URL, msgpack.packb({'title': 'Packed'}), content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(res.content)['title'], 'Packed')
+
+    def test_large_responses_are_gzipped(self):
+        """Test big task lists are compressed and small responses aren't"""
+        res = self.client.get(TASKS_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        res = self.client.get(TASKS_URL, {'limit': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(res.has_header('Content-Encoding'))
+
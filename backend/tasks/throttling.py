@@ -0,0 +1,167 @@
+# tasks/throttling.py
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import BaseThrottle
+
+KEY = 'throttle:{scope}:{ident}'
+
+
+# Refill and spend in one step on the Redis server, so concurrent requests
+# can't all read the same state and each take the last token
+TAKE_SCRIPT = """
+local capacity, per_second, moment = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens, stamp = tonumber(state[1]), tonumber(state[2])
+if tokens == nil or stamp == nil then
+    tokens, stamp = capacity, moment
+end
+tokens = math.min(capacity, tokens + math.max(moment - stamp, 0) * per_second)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(moment))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return {allowed, tostring(tokens)}
+"""
+
+
+class BucketStore:
+    """
+    Token buckets kept in Django's cache. Workers only share them when the
+    cache is shared (REDIS_URL, see settings); with the per-process default
+    each worker keeps its own buckets and the limits apply per process.
+
+    Each spend is atomic: a Lua script on Redis, and this process's lock
+    around the read and write-back on other backends (the only writers of a
+    per-process cache). If the cache backend fails, the buckets fall back
+    to this process's memory.
+    """
+
+    def __init__(self, max_local_entries=10000):
+        self.max_local_entries = max_local_entries
+        self._local = {}
+        self._lock = threading.Lock()
+        self._script = None
+
+    def take(self, key, capacity, per_second):
+        """Spend a token from key's bucket; returns (allowed, seconds until the next token)"""
+        moment = time.time()
+        timeout = math.ceil(capacity / per_second) + 1
+        backend = caches[DEFAULT_CACHE_ALIAS]
+        try:
+            if isinstance(backend, RedisCache):
+                return self._take_redis(backend, key, capacity, per_second, moment, timeout)
+            with self._lock:
+                allowed, wait, state = self._spend(cache.get(key), moment, capacity, per_second)
+                cache.set(key, state, timeout=timeout)
+            return allowed, wait
+        except Exception:
+            with self._lock:
+                allowed, wait, state = self._spend(self._local.get(key), moment, capacity, per_second)
+                self._local[key] = state
+                if len(self._local) > self.max_local_entries:
+                    self._prune(moment, capacity, per_second)
+            return allowed, wait
+
+    def _take_redis(self, backend, key, capacity, per_second, moment, timeout):
+        key = backend.make_and_validate_key(key)
+        client = backend._cache.get_client(key, write=True)
+        if self._script is None:
+            self._script = client.register_script(TAKE_SCRIPT)
+        allowed, tokens = self._script(keys=[key], args=[capacity, per_second, moment, timeout], client=client)
+        if allowed:
+            return True, 0
+        return False, (1 - float(tokens)) / per_second
+
+    @staticmethod
+    def _spend(state, moment, capacity, per_second):
+        tokens, stamp = state or (capacity, moment)
+        tokens = min(capacity, tokens + (moment - stamp) * per_second)
+        if tokens >= 1:
+            return True, 0, (tokens - 1, moment)
+        return False, (1 - tokens) / per_second, (tokens, moment)
+
+    def _prune(self, moment, capacity, per_second):
+        # Drop buckets that have refilled completely; they're the default
+        full_after = capacity / per_second
+        for key in [key for key, (_, stamp) in self._local.items() if moment - stamp >= full_after]:
+            del self._local[key]
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+bucket_store = BucketStore()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle allowing bursts of <PREFIX>_BURST requests, refilled at
+    <PREFIX>_PER_MINUTE. DRF checks throttles before the view runs, so a
+    rejected request never reaches authenticate() or the password hasher;
+    it gets a 429 with Retry-After. A burst of 0 turns the throttle off.
+    """
+
+    scope = 'auth'
+    setting_prefix = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        capacity = getattr(settings, f'{self.setting_prefix}_BURST')
+        per_minute = getattr(settings, f'{self.setting_prefix}_PER_MINUTE')
+        if capacity <= 0 or per_minute <= 0:
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+        key = KEY.format(scope=self.scope, ident=ident)
+        allowed, self.retry_after = bucket_store.take(key, capacity, per_minute / 60)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """
+    Password-hashing requests per client IP. get_ident() only trusts the
+    X-Forwarded-For entries added by the NUM_PROXIES proxies in front of us.
+    """
+
+    setting_prefix = 'AUTH_THROTTLE_IP'
+
+    def get_ident_key(self, request):
+        return 'ip:' + self.get_ident(request)
+
+
+class AuthEmailThrottle(TokenBucketThrottle):
+    """Password-hashing requests per account email, whatever IP they come from"""
+
+    setting_prefix = 'AUTH_THROTTLE_EMAIL'
+
+    def get_ident_key(self, request):
+        try:
+            email = request.data.get(get_user_model().USERNAME_FIELD)
+        except AttributeError:
+            # A JSON list or scalar body has no email to key on
+            return None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Hashed so keys stay short and cache-safe whatever is submitted
+        return 'email:' + hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
+AUTH_THROTTLES = [AuthIPThrottle, AuthEmailThrottle]
@@ -1,5 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
+from .metrics import metrics_view
 from .views import (
     TaskViewSet,
     RegisterView,
@@ -30,7 +32,16 @@ urlpatterns = [
     path('api/complete-onboarding/', CompleteOnboardingView.as_view(), name='complete-onboarding'),
     path('user/', CurrentUserView.as_view(), name='current-user'),
     
+    # Async read endpoints (served natively under ASGI)
+    path('async/tasks/', async_views.task_list, name='async_task_list'),
+    path('async/tasks/<int:pk>/', async_views.task_detail, name='async_task_detail'),
+    path('async/upcoming/', async_views.upcoming_tasks, name='async_upcoming_tasks'),
+    path('async/user/', async_views.current_user, name='async_current_user'),
+
     # Email Verification
     path('verify-email/<str:token>/', VerifyEmailView.as_view(), name='verify_email'),
+
+    # Prometheus metrics
+    path('metrics/', metrics_view, name='metrics'),
     
 ]
\ No newline at end of file
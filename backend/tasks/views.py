@@ -1,10 +1,11 @@
 from django.shortcuts import render
+from django.http import StreamingHttpResponse
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import viewsets, permissions
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from datetime import timedelta
 from django.utils.timezone import now
 from django.contrib.auth import authenticate, get_user_model
@@ -12,51 +13,253 @@ from django.shortcuts import get_object_or_404
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.conf import settings
 import logging
-from .serializers import CustomUserSerializer, TaskSerializer
-from .models import Task, CustomUser
-from .pagination import TaskPagination
+from .serializers import (
+    CustomUserSerializer,
+    TaskBatchOperationSerializer,
+    TaskMoveSerializer,
+    TaskSerializer,
+    requested_task_fields,
+    serialize_task_values,
+    task_values,
+)
+from .models import ArchivedTask, Task, CustomUser
+from .pagination import TaskPagination, get_task_paginator
+from .ordering import apply_order, move_task, next_order
+from .search import TaskSearchFilter
+from .sharding import user_shard
+from .authentication import TokenOnlyJWTAuthentication
+from .caching import cached_task_response
+from .agenda import parse_calendar_range, tasks_by_day
+from .archive import restore_tasks
+from .stats import STATS_DEFAULT_DAYS, STATS_MAX_DAYS, task_summary
+from .sync import changes_since, decode_sync_token
+from .batch import apply_batch, validate_batch
+from .export import EXPORT_FORMATS, export_lines
+from .importer import IMPORT_FORMATS, guess_format, import_tasks, read_rows
+from .throttling import AUTH_THROTTLES
+from .log import log_event
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
+    authentication_classes = [TokenOnlyJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = TaskPagination
+    filter_backends = [TaskSearchFilter]
+    # Sparse fieldset of list and retrieve (?fields= / ?exclude=), None for all
+    task_fields = None
 
     def get_queryset(self):
-         tasks = Task.objects.filter(user=self.request.user).order_by('order')
+         # ?archived=true lists the archive instead; the other actions only
+         # ever work on active tasks
+         model = ArchivedTask if self.action == 'list' and self.wants_archive() else Task
+         tasks = model.objects.for_user(self.request.user.id).order_by('order', 'id')
+         if self.action == 'retrieve' and self.task_fields is not None:
+             tasks = tasks.only(*self.task_fields)
          return tasks
 
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'retrieve':
+            kwargs.setdefault('fields', self.task_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def wants_archive(self):
+        return self.request.query_params.get('archived', '').lower() in ('1', 'true', 'yes')
+
+    @property
+    def paginator(self):
+        # Only paginate when the client asks for it, so the dashboard that
+        # expects a plain list keeps working
+        if not hasattr(self, '_paginator'):
+            self._paginator = get_task_paginator(self.request)
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        try:
+            self.task_fields = requested_task_fields(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return cached_task_response(request, self.build_list_response)
+
+    def build_list_response(self):
+        # Read-only fast path: fetch just the serialized (or requested)
+        # columns as dicts instead of building Task instances
+        queryset = task_values(self.filter_queryset(self.get_queryset()), self.task_fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_task_values(page, self.task_fields))
+        return Response(serialize_task_values(queryset, self.task_fields))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            self.task_fields = requested_task_fields(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with user_shard(self.request.user.id):
+            serializer.save(user_id=self.request.user.id, order=next_order(self.request.user.id))
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Tasks changed or deleted since ?since=<token>, plus a new token"""
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_sync_token(since)
+            except (ValueError, OverflowError, OSError):
+                return Response({'error': 'Invalid sync token'}, status=400)
+
+        tasks, deleted, token, reset = changes_since(request.user.id, since or None)
+        return Response({
+            'changed': self.get_serializer(tasks, many=True).data,
+            'deleted': deleted,
+            'token': token,
+            'reset': reset,
+        })
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Apply a list of create/update/delete operations in one transaction.
+        Nothing is written unless every operation is valid.
+        """
+        operations = request.data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response({'error': 'No operations provided'}, status=400)
+        if len(operations) > settings.TASK_BATCH_MAX_OPERATIONS:
+            return Response(
+                {'error': f'At most {settings.TASK_BATCH_MAX_OPERATIONS} operations per batch'},
+                status=400
+            )
+
+        serializer = TaskBatchOperationSerializer(data=operations, many=True)
+        if not serializer.is_valid():
+            errors = {i: e for i, e in enumerate(serializer.errors) if e}
+        else:
+            plan, errors = validate_batch(request.user.id, serializer.validated_data)
+        if errors:
+            results = [
+                {'status': 'error', 'errors': errors[i]} if i in errors else {'status': 'ok'}
+                for i in range(len(operations))
+            ]
+            return Response({'results': results}, status=400)
+
+        return Response({'results': apply_batch(request.user.id, plan)})
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Dashboard counts plus tasks completed per day over the last ?days="""
+        try:
+            days = int(request.query_params.get('days', STATS_DEFAULT_DAYS))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= STATS_MAX_DAYS:
+            return Response({'error': f'days must be between 1 and {STATS_MAX_DAYS}'}, status=400)
+
+        # Cached per task version like the list; the counts depend on the
+        # clock too (overdue, today), so cached copies only live a minute
+        return cached_task_response(
+            request,
+            lambda: Response(task_summary(request.user.id, days)),
+            time_bucket=60
+        )
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """Tasks due from ?start= to ?end= (dates, inclusive) in ?tz=, bucketed per day"""
+        params = request.query_params
+        try:
+            start, end, zone = parse_calendar_range(params.get('start'), params.get('end'), params.get('tz'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        return cached_task_response(
+            request,
+            lambda: Response({
+                'time_zone': zone.key,
+                'days': tasks_by_day(request.user.id, start, end, zone),
+            })
+        )
+
+    @action(detail=False, methods=['post'])
+    def restore(self, request):
+        """Bring archived tasks {"ids": [...]} back into the list, reopened"""
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'No task ids provided'}, status=400)
+        try:
+            ids = [int(task_id) for task_id in ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'Task ids must be integers'}, status=400)
+
+        restored = restore_tasks(request.user.id, ids)
+        if not restored:
+            return Response({'error': 'No archived tasks found'}, status=404)
+        return Response({'restored': restored})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every task of the user as ?as=ndjson (default) or ?as=csv"""
+        export_format = request.query_params.get('as', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"Unknown export format. Use one of: {', '.join(EXPORT_FORMATS)}"},
+                status=400
+            )
+
+        response = StreamingHttpResponse(
+            export_lines(self.get_queryset(), export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_file(self, request):
+        """
+        Import tasks from an uploaded NDJSON or CSV `file`. The format comes
+        from ?as= or the file extension. Bad rows are reported, not fatal.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file provided'}, status=400)
+        import_format = request.query_params.get('as') or guess_format(upload.name)
+        if import_format not in IMPORT_FORMATS:
+            return Response(
+                {'error': f"Unknown import format. Use one of: {', '.join(IMPORT_FORMATS)}"},
+                status=400
+            )
+
+        summary = import_tasks(request.user.id, read_rows(upload, import_format))
+        return Response(summary, status=201 if summary['imported'] else 400)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = AUTH_THROTTLES
 
     def post(self, request):
-        logger.info(f"Registration request received. Data: {request.data}")
+        log_event(logger, logging.INFO, 'registration.received', data=request.data)
         
         serializer = CustomUserSerializer(data=request.data)
         if not serializer.is_valid():
-            logger.warning(f"Validation errors: {serializer.errors}")
+            log_event(logger, logging.WARNING, 'registration.invalid', errors=serializer.errors)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            logger.debug("Creating user...")
+            log_event(logger, logging.DEBUG, 'registration.creating_user')
             user = CustomUser.objects.create_user(
                 username=serializer.validated_data['username'],
                 email=serializer.validated_data['email'],
                 password=serializer.validated_data['password']
             )
-            logger.info(f"User created successfully: {user}")
+            log_event(logger, logging.INFO, 'registration.created', user_id=user.id, email=user.email)
 
             refresh = RefreshToken.for_user(user)
             response_data = {
@@ -64,7 +267,7 @@ class RegisterView(APIView):
                 "access": str(refresh.access_token),
                 "refresh": str(refresh)
             }
-            logger.debug(f"Returning response: {response_data}")
+            log_event(logger, logging.DEBUG, 'registration.response', response=response_data)
             
             return Response(
                 response_data,
@@ -73,7 +276,7 @@ class RegisterView(APIView):
             )
 
         except Exception as e:
-            logger.error(f"Registration failed: {str(e)}", exc_info=True)
+            log_event(logger, logging.ERROR, 'registration.failed', exc_info=True, error=str(e))
             return Response(
                 {"error": "Registration failed. Please try again."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -81,6 +284,7 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = AUTH_THROTTLES
 
     def post(self, request):
         email = request.data.get('email')
@@ -140,39 +344,54 @@ class CurrentUserView(APIView):
 
 
 @api_view(['PATCH'])
+@authentication_classes([TokenOnlyJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def reorder_tasks(request):
+    move = request.data.get('move')
+    if move is not None:
+        # Single drag-and-drop: {"move": {"id": 3, "before": 7}} or "after"
+        serializer = TaskMoveSerializer(data=move)
+        if not serializer.is_valid():
+            return Response({'error': serializer.errors}, status=400)
+        move = serializer.validated_data
+        task = get_object_or_404(Task.objects.for_user(request.user.id), id=move['id'])
+        try:
+            move_task(task, before=move.get('before'), after=move.get('after'))
+        except (ValueError, Task.DoesNotExist) as e:
+            return Response({'error': str(e)}, status=400)
+        return Response({'status': 'Order updated', 'id': task.id, 'order': task.order})
+
     task_order = request.data.get('task_order')
     if not task_order:
         return Response({'error': 'No task order provided'}, status=400)
 
     try:
-        tasks = {
-            task.id: task for task in 
-            Task.objects.filter(id__in=[item['id'] for item in task_order], user=request.user)
-        }
-        
-        for item in task_order:
-            task = tasks.get(item['id'])
-            if task:
-                task.order = item['order']
-                task.save()
+        orders = {int(item['id']): int(item['order']) for item in task_order}
+        apply_order(request.user.id, orders)
 
         return Response({'status': 'Order updated'})
     except Exception as e:
         return Response({'error': str(e)}, status=400)
 
 @api_view(['GET'])
+@authentication_classes([TokenOnlyJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def upcoming_tasks(request):
-    soon = now() + timedelta(hours=24)
-    tasks = Task.objects.filter(
-        user=request.user, 
-        completed=False, 
-        due_date__lte=soon
-    ).order_by('due_date')
-    serializer = TaskSerializer(tasks, many=True)
-    return Response(serializer.data)
+    try:
+        fields = requested_task_fields(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    def build_response():
+        soon = now() + timedelta(hours=24)
+        tasks = Task.objects.for_user(request.user.id).filter(
+            completed=False, 
+            due_date__lte=soon
+        ).order_by('due_date')
+        return Response(serialize_task_values(task_values(tasks, fields), fields))
+
+    # The 24h window moves with the clock, so cached copies only live a minute
+    return cached_task_response(request, build_response, time_bucket=60)
 
 
 @api_view(['POST'])